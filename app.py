@@ -1,4 +1,5 @@
-from flask import Flask, request, send_file, redirect, jsonify, url_for
+from flask import Flask, request, send_file, redirect, jsonify, url_for, g, has_app_context
+from werkzeug.http import is_resource_modified
 from flask_cors import CORS
 from authlib.integrations.flask_client import OAuth
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -6,15 +7,27 @@ from dotenv import load_dotenv
 from convert import convert_to_html
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
+import base64
+import concurrent.futures
 import csv
+import heapq
+import itertools
 import json
 import hashlib
+import math
 import os
 import re
 import jwt
+import multiprocessing
+import numpy as np
 import secrets
 import smtplib
 import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
 from email.message import EmailMessage
 
 load_dotenv()
@@ -42,6 +55,25 @@ AUTH_TOKEN_IN_URL = os.getenv("AUTH_TOKEN_IN_URL", "true").lower() == "true"
 AUTH_REQUIRE_TOKEN = os.getenv("AUTH_REQUIRE_TOKEN", "false").lower() == "true"
 REPORTS_DIR = os.getenv("REPORTS_DIR") or BASE_DIR
 FEEDBACK_LOG_PATH = os.getenv("FEEDBACK_LOG_PATH", os.path.join(BASE_DIR, "feedback_log.jsonl"))
+SQLITE_POOLING = os.getenv("SQLITE_POOLING", "true").lower() in {"1", "true", "yes"}
+SQLITE_POOL_MAX_IDLE = int(os.getenv("SQLITE_POOL_MAX_IDLE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "16"))
+PASSWORD_HASH_DEADLINE_SECONDS = float(os.getenv("PASSWORD_HASH_DEADLINE_SECONDS", "5"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "4096"))
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+RESULTS_CACHE_MAX_ENTRIES = int(os.getenv("RESULTS_CACHE_MAX_ENTRIES", "32"))
+# Estimated in-memory size of the parsed tables, per cache and per process.
+RESULTS_CACHE_MAX_BYTES = int(os.getenv("RESULTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+RESULTS_COLUMNAR_CACHE_ENTRIES = int(os.getenv("RESULTS_COLUMNAR_CACHE_ENTRIES", "16"))
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "200"))
+RESULTS_PAGE_MAX = int(os.getenv("RESULTS_PAGE_MAX", "5000"))
+CHAT_LIST_PAGE_SIZE = int(os.getenv("CHAT_LIST_PAGE_SIZE", "50"))
+CHAT_MESSAGES_PAGE_SIZE = int(os.getenv("CHAT_MESSAGES_PAGE_SIZE", "100"))
+CHAT_PAGE_MAX = int(os.getenv("CHAT_PAGE_MAX", "500"))
 WRITE_UI_ARTIFACTS = os.getenv("WRITE_UI_ARTIFACTS", os.getenv("WRITE_ARTIFACTS", "false")).lower() in {
     "1",
     "true",
@@ -81,8 +113,87 @@ if GOOGLE_CLIENT_ID and GOOGLE_CLIENT_SECRET:
 #     json.dump([], file)
 
 
+class ConnectionPool:
+    """Reusable SQLite connections for one database file.
+
+    A request checks a connection out on first use and returns it when the app
+    context tears down, so every helper in a request shares one connection and
+    its prepared-statement cache. Connections are tuned once when opened;
+    journal_mode=WAL is persistent and set by the init_*_db functions.
+    """
+
+    def __init__(self, path, max_idle=SQLITE_POOL_MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: never share the parent's file handles.
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return open_db_connection(self.path)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+_connection_pools = {}
+
+
+def open_db_connection(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=SQLITE_CACHED_STATEMENTS,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _request_connection(path):
+    if not SQLITE_POOLING:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+    if not has_app_context():
+        return open_db_connection(path)
+    connections = g.setdefault("db_connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        pool = _connection_pools.get(path)
+        if pool is None:
+            pool = _connection_pools.setdefault(path, ConnectionPool(path))
+        conn = connections[path] = pool.acquire()
+    return conn
+
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    for path, conn in g.pop("db_connections", {}).items():
+        _connection_pools[path].release(conn)
+
+
 def init_auth_db():
     with sqlite3.connect(AUTH_DB_PATH) as conn:
+        if SQLITE_POOLING:
+            conn.execute("PRAGMA journal_mode = WAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS users (
@@ -101,8 +212,86 @@ def init_auth_db():
         conn.commit()
 
 
+CHAT_DB_MIGRATIONS = [
+    (
+        1,
+        "chat_query_indexes",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_chat_threads_user_updated ON chat_threads (user_id, updated_at)",
+            "CREATE INDEX IF NOT EXISTS idx_chat_messages_thread_id ON chat_messages (thread_id, id)",
+            "CREATE INDEX IF NOT EXISTS idx_chat_attachments_thread_message "
+            "ON chat_message_attachments (thread_id, message_id)",
+        ],
+    ),
+    (
+        2,
+        "chat_sync_watermarks",
+        [
+            # Every thread write takes the next value of a single counter inside
+            # its transaction, so sync_seq order is commit order and a client
+            # holding watermark N has seen every change with sync_seq <= N.
+            "CREATE TABLE IF NOT EXISTS chat_sync_sequence (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL)",
+            "INSERT OR IGNORE INTO chat_sync_sequence (id, value) VALUES (1, 0)",
+            "ALTER TABLE chat_threads ADD COLUMN sync_seq INTEGER NOT NULL DEFAULT 0",
+            "CREATE INDEX IF NOT EXISTS idx_chat_threads_user_sync ON chat_threads (user_id, sync_seq)",
+            """
+            CREATE TABLE IF NOT EXISTS chat_thread_tombstones (
+                thread_id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                sync_seq INTEGER NOT NULL,
+                deleted_at TEXT NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_chat_tombstones_user_sync ON chat_thread_tombstones (user_id, sync_seq)",
+        ],
+    ),
+]
+
+
+def run_migrations(conn, migrations):
+    """Apply pending (version, name, statements) steps in version order.
+
+    Each step runs in its own IMMEDIATE transaction and is recorded in
+    schema_migrations, so a step is applied exactly once even when several
+    workers start at the same time.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.commit()
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    for version, name, statements in sorted(migrations, key=lambda migration: migration[0]):
+        if version in applied:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied chat DB migration {version} ({name})")
+
+
 def init_chat_db():
-    with sqlite3.connect(CHAT_DB_PATH) as conn:
+    # Generous timeout: another worker may be building indexes on a large database.
+    with sqlite3.connect(CHAT_DB_PATH, timeout=60) as conn:
+        if SQLITE_POOLING:
+            conn.execute("PRAGMA journal_mode = WAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS chat_threads (
@@ -142,18 +331,203 @@ def init_chat_db():
             """
         )
         conn.commit()
+        run_migrations(conn, CHAT_DB_MIGRATIONS)
 
 
 def get_db_connection():
-    conn = sqlite3.connect(AUTH_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _request_connection(AUTH_DB_PATH)
 
 
 def get_chat_db_connection():
-    conn = sqlite3.connect(CHAT_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return _request_connection(CHAT_DB_PATH)
+
+
+class ExpiringCache:
+    """Bounded LRU whose entries carry their own expiry time (epoch seconds)."""
+
+    def __init__(self, max_entries=AUTH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, expires_at):
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+
+# Verified JWT claims by token, kept until the token's own exp. User rows by
+# id and thread ownership are kept for AUTH_USER_CACHE_TTL_SECONDS and dropped
+# by the writers below; other worker processes see such changes after the TTL.
+_token_claims_cache = ExpiringCache()
+_user_row_cache = ExpiringCache()
+_thread_owner_cache = ExpiringCache()
+
+
+def invalidate_user_cache(user_id):
+    user_id = int(user_id)
+    _user_row_cache.discard(user_id)
+    _token_claims_cache.discard_where(lambda token, claims: str(claims.get("sub")) == str(user_id))
+
+
+class PasswordHashBusy(Exception):
+    """The hashing pool is full or missed the request's deadline."""
+
+
+def _run_hash_job(fn, args):
+    # Runs in a pool worker; the timestamps let the caller split queue wait from hashing.
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+class PasswordHashPool:
+    """werkzeug password hashing in worker processes, off the request threads.
+
+    At most workers + queue_size jobs are in flight; beyond that, and when a
+    job misses its deadline, callers get PasswordHashBusy right away instead of
+    tying up a request thread. A job that misses its deadline still finishes
+    in the pool and holds its slot until then, so the bound stays honest.
+    PASSWORD_HASH_WORKERS=0 hashes inline.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE,
+                 deadline=PASSWORD_HASH_DEADLINE_SECONDS):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.deadline = deadline
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {
+            "completed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+            "hash_ms_total": 0.0,
+        }
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            # spawn: workers never inherit this process's threads or open sqlite handles.
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, fn, *args):
+        if self.workers <= 0:
+            result, started, finished = _run_hash_job(fn, args)
+            self._record(0.0, (finished - started) * 1000)
+            return result
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats["rejected"] += 1
+                raise PasswordHashBusy("password hashing queue is full")
+            self._in_flight += 1
+            executor = self._get_executor()
+        submitted = time.time()
+        try:
+            future = executor.submit(_run_hash_job, fn, args)
+        except Exception:
+            self._release()
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise PasswordHashBusy("password hashing pool unavailable")
+        future.add_done_callback(self._release)
+        try:
+            result, started, finished = future.result(timeout=self.deadline)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self.stats["timed_out"] += 1
+            raise PasswordHashBusy("password hashing deadline exceeded")
+        except concurrent.futures.process.BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise PasswordHashBusy("password hashing pool restarted")
+        self._record(max(0.0, started - submitted) * 1000, (finished - started) * 1000)
+        return result
+
+    def _record(self, wait_ms, hash_ms):
+        with self._lock:
+            self.stats["completed"] += 1
+            self.stats["queue_wait_ms_total"] += wait_ms
+            self.stats["queue_wait_ms_max"] = max(self.stats["queue_wait_ms_max"], wait_ms)
+            self.stats["hash_ms_total"] += hash_ms
+        if has_app_context():
+            g.setdefault("server_timing", []).extend([("hash-queue", wait_ms), ("hash", hash_ms)])
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = self._in_flight
+        stats.update(workers=self.workers, capacity=self.capacity, deadline_seconds=self.deadline)
+        completed = stats["completed"] or 1
+        stats["queue_wait_ms_avg"] = stats["queue_wait_ms_total"] / completed
+        for name in ("queue_wait_ms_total", "queue_wait_ms_max", "queue_wait_ms_avg", "hash_ms_total"):
+            stats[name] = round(stats[name], 3)
+        return stats
+
+
+_password_hash_pool = PasswordHashPool()
+
+
+def hash_password(password):
+    return _password_hash_pool.run(generate_password_hash, password)
+
+
+def verify_password(password_hash, password):
+    return _password_hash_pool.run(check_password_hash, password_hash, password)
+
+
+def password_busy_response():
+    response = jsonify({"error": "Server is busy, please try again shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+@app.after_request
+def add_server_timing(response):
+    timings = g.pop("server_timing", None)
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(f"{name};dur={value:.1f}" for name, value in timings)
+    return response
 
 
 def serialize_user(row):
@@ -180,7 +554,13 @@ def create_access_token(user_row):
 
 
 def decode_access_token(token):
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    claims = _token_claims_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            _token_claims_cache.put(token, claims, expires_at)
+    return claims
 
 
 def get_bearer_token():
@@ -206,18 +586,23 @@ def require_auth():
 
 
 def get_user_from_token():
+    # Request-scoped: routes and helpers can ask repeatedly for one verification.
+    if "auth_user" in g:
+        return g.auth_user
     token = get_request_token()
-    if not token:
-        return None
-    try:
-        payload = decode_access_token(token)
-    except jwt.InvalidTokenError:
-        return None
-    return {
-        "id": payload.get("sub"),
-        "email": payload.get("email"),
-        "name": payload.get("name"),
-    }
+    user = None
+    if token:
+        try:
+            payload = decode_access_token(token)
+            user = {
+                "id": payload.get("sub"),
+                "email": payload.get("email"),
+                "name": payload.get("name"),
+            }
+        except jwt.InvalidTokenError:
+            user = None
+    g.auth_user = user
+    return user
 
 
 def send_reset_email(recipient, reset_url):
@@ -264,11 +649,32 @@ def get_user_by_email(email):
 
 
 def get_user_by_id(user_id):
+    user = _user_row_cache.get(user_id)
+    if user is not None:
+        return user
     with get_db_connection() as conn:
-        return conn.execute(
+        user = conn.execute(
             "SELECT * FROM users WHERE id = ?",
             (user_id,),
         ).fetchone()
+    if user is not None:
+        _user_row_cache.put(user_id, user, time.time() + AUTH_USER_CACHE_TTL_SECONDS)
+    return user
+
+
+def user_owns_thread(thread_id, user_id):
+    """Ownership check for read-only routes; positive answers are cached."""
+    if _thread_owner_cache.get(thread_id) == user_id:
+        return True
+    with get_chat_db_connection() as conn:
+        thread = conn.execute(
+            "SELECT id FROM chat_threads WHERE id = ? AND user_id = ?",
+            (thread_id, user_id),
+        ).fetchone()
+    if not thread:
+        return False
+    _thread_owner_cache.put(thread_id, user_id, time.time() + AUTH_USER_CACHE_TTL_SECONDS)
+    return True
 
 
 def _sanitize_thread_id(thread_id):
@@ -280,24 +686,581 @@ def _sanitize_thread_id(thread_id):
     return re.sub(r"[^A-Za-z0-9_.-]+", "_", value)
 
 
-def _load_results_table(thread_id):
+class ResultsCache:
+    """LRU of parsed Results.csv tables keyed by (path, mtime_ns, size).
+
+    A rewritten or appended file gets a new key, so stale entries are never
+    served; they age out of the LRU. Bounded by entry count and by the total
+    estimated in-memory size of the cached tables, which put() is given;
+    parsed rows take many times the CSV's size on disk.
+    """
+
+    def __init__(self, max_entries=RESULTS_CACHE_MAX_ENTRIES, max_bytes=RESULTS_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, table, size):
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            # Only the newest version of a file is worth keeping.
+            for stale in [other for other in self._entries if other[0] == key[0]]:
+                self._bytes -= self._entries.pop(stale)[1]
+            self._entries[key] = (table, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+
+def _parsed_rows_bytes(rows):
+    """Estimated memory held by parsed CSV rows, from a sample of at most 64 rows.
+
+    Keys are not counted: DictReader shares one set of fieldname strings.
+    """
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[:: max(1, len(rows) // 64)]
+    sampled = sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row.values())) for row in sample)
+    return sys.getsizeof(rows) + sampled * len(rows) // len(sample)
+
+
+_results_cache = ResultsCache()
+
+
+def _results_csv_path(thread_id):
     safe_thread_id = _sanitize_thread_id(thread_id)
     if not safe_thread_id:
-        return {"columns": [], "rows": [], "updated_at": None}
-    csv_path = os.path.join(PIPELINE_ARTIFACTS_DIR, safe_thread_id, "Results.csv")
-    if not os.path.exists(csv_path):
+        return None
+    return os.path.join(PIPELINE_ARTIFACTS_DIR, safe_thread_id, "Results.csv")
+
+
+def _results_stat(thread_id):
+    csv_path = _results_csv_path(thread_id)
+    if not csv_path:
+        return None
+    try:
+        return os.stat(csv_path)
+    except FileNotFoundError:
+        return None
+
+
+def _load_results_table(thread_id):
+    csv_path = _results_csv_path(thread_id)
+    if not csv_path:
         return {"columns": [], "rows": [], "updated_at": None}
     try:
         with open(csv_path, "r", newline="") as handle:
+            stat = os.fstat(handle.fileno())
+            key = (csv_path, stat.st_mtime_ns, stat.st_size)
+            table = _results_cache.get(key)
+            if table is not None:
+                return table
             reader = csv.DictReader(handle)
             rows = list(reader)
             columns = reader.fieldnames or []
-        updated_at = int(os.path.getmtime(csv_path) * 1000)
-        return {"columns": columns, "rows": rows, "updated_at": updated_at}
+        table = {"columns": columns, "rows": rows, "updated_at": stat.st_mtime_ns // 1_000_000}
+        _results_cache.put(key, table, _parsed_rows_bytes(rows))
+        return table
     except FileNotFoundError:
         return {"columns": [], "rows": [], "updated_at": None}
 
 
+RESULTS_FILTER_OPS = {"eq", "ne", "lt", "le", "gt", "ge", "contains"}
+RESULTS_QUERY_PARAMS = ("offset", "limit", "columns", "sort", "filter")
+
+
+_NUMBER_START = frozenset("0123456789+-.")
+
+
+def _as_number(value):
+    # The first-character check skips float()'s exception path for text cells.
+    if not value or value[0] not in _NUMBER_START:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    # "-inf" and "-nan" parse; like "inf" and "nan" they sort and filter as text.
+    return number if math.isfinite(number) else None
+
+
+def _results_sort_key(value):
+    """Numbers before text before blanks; numbers compare numerically."""
+    if not value:
+        return (2, 0.0, "")
+    number = _as_number(value)
+    if number is not None:
+        return (0, number, "")
+    return (1, 0.0, value)
+
+
+def _results_filter(get, op, operand):
+    operand_number = _as_number(operand)
+    needle = operand.lower()
+
+    def matches(row):
+        value = get(row)
+        if value is None:
+            return op == "ne"
+        if op == "contains":
+            return needle in value.lower()
+        number = _as_number(value)
+        if number is not None and operand_number is not None:
+            left, right = number, operand_number
+        else:
+            left, right = value, operand
+        if op == "eq":
+            return left == right
+        if op == "ne":
+            return left != right
+        if op == "lt":
+            return left < right
+        if op == "le":
+            return left <= right
+        if op == "gt":
+            return left > right
+        return left >= right
+
+    return matches
+
+
+def _parse_results_query(args):
+    """Read offset/limit/columns/sort/filter from the query string.
+
+    columns=a,b projects, sort=col or sort=-col orders (descending with "-"),
+    and each filter=col:op:value keeps rows matching op (eq, ne, lt, le, gt,
+    ge, contains). Raises ValueError with a client-facing message.
+    """
+    try:
+        offset = int(args.get("offset") or 0)
+        limit = int(args.get("limit") or RESULTS_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or limit < 1:
+        raise ValueError("offset must be >= 0 and limit >= 1")
+    columns = [column.strip() for column in (args.get("columns") or "").split(",") if column.strip()]
+    sort = (args.get("sort") or "").strip() or None
+    descending = bool(sort) and sort.startswith("-")
+    if descending:
+        sort = sort[1:]
+    filters = []
+    for spec in args.getlist("filter"):
+        parts = spec.split(":", 2)
+        if len(parts) != 3 or parts[1] not in RESULTS_FILTER_OPS:
+            raise ValueError(f"Invalid filter {spec!r}; expected column:op:value")
+        filters.append(tuple(parts))
+    return {
+        "offset": offset,
+        "limit": min(limit, RESULTS_PAGE_MAX),
+        "columns": columns,
+        "sort": sort,
+        "descending": descending,
+        "filters": filters,
+    }
+
+
+def _page_results(rows, fieldnames, query, as_lists=False):
+    """Apply filters, sort and paging to an iterator of rows.
+
+    Rows are dicts, or lists aligned with fieldnames when as_lists is set
+    (the streaming path, which skips DictReader). Without a sort only
+    offset + limit + 1 rows are pulled from `rows`, so the caller can stop
+    reading a large file early and total is unknown. A sort keeps just the
+    best offset + limit rows in a heap while it scans.
+    """
+    referenced = list(query["columns"]) + [column for column, _, _ in query["filters"]]
+    if query["sort"]:
+        referenced.append(query["sort"])
+    unknown = [column for column in referenced if column not in fieldnames]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(dict.fromkeys(unknown))}")
+
+    def getter(column):
+        return itemgetter(fieldnames.index(column) if as_lists else column)
+
+    predicates = [_results_filter(getter(column), op, operand) for column, op, operand in query["filters"]]
+    if predicates:
+        rows = (row for row in rows if all(predicate(row) for predicate in predicates))
+    offset, limit = query["offset"], query["limit"]
+    total = None
+    if query["sort"]:
+        get = getter(query["sort"])
+        matched = itertools.count()
+        counted = (row for row in rows if next(matched) is not None)
+        if query["descending"]:
+            # Blanks stay last in both directions.
+            def key(row):
+                kind, number, text = _results_sort_key(get(row))
+                return (kind != 2, -kind, number, text)
+
+            top = heapq.nlargest(offset + limit, counted, key=key)
+        else:
+            top = heapq.nsmallest(offset + limit, counted, key=lambda row: _results_sort_key(get(row)))
+        total = next(matched)
+        page = top[offset:]
+        has_more = offset + limit < total
+    else:
+        page = list(itertools.islice(rows, offset, offset + limit + 1))
+        has_more = len(page) > limit
+        page = page[:limit]
+
+    columns = query["columns"] or list(fieldnames)
+    if as_lists:
+        page = [dict(zip(fieldnames, row)) for row in page]
+    if query["columns"]:
+        page = [{column: row.get(column) for column in columns} for row in page]
+    return {"columns": columns, "rows": page, "offset": offset, "limit": limit, "total": total, "has_more": has_more}
+
+
+def _query_results_table(thread_id, query):
+    """One page of a thread's Results.csv, from the cache or streamed off disk."""
+    csv_path = _results_csv_path(thread_id)
+    empty = {"columns": [], "rows": [], "updated_at": None, "offset": query["offset"], "limit": query["limit"],
+             "total": 0, "has_more": False}
+    if not csv_path:
+        return empty
+    try:
+        with open(csv_path, "r", newline="") as handle:
+            stat = os.fstat(handle.fileno())
+            table = _results_cache.get((csv_path, stat.st_mtime_ns, stat.st_size))
+            if table is not None:
+                page = _page_results(iter(table["rows"]), table["columns"], query)
+            else:
+                reader = csv.reader(handle)
+                fieldnames = next(reader, [])
+                width = len(fieldnames)
+                # Pad short rows the way DictReader fills missing fields.
+                rows = (row if len(row) >= width else row + [None] * (width - len(row)) for row in reader)
+                page = _page_results(rows, fieldnames, query, as_lists=True)
+    except FileNotFoundError:
+        return empty
+    page["updated_at"] = stat.st_mtime_ns // 1_000_000
+    return page
+
+
+class ColumnarTable:
+    """Typed, column-oriented copy of a Results.csv for vectorized aggregates.
+
+    Each column's type is inferred once when the table is built. A column
+    whose non-blank cells all parse as finite numbers becomes a float64 array with
+    NaN for blanks ("integer" if every value is whole, else "float").
+    Anything else is "text", dictionary-encoded as int32 codes into a sorted
+    object array of categories. Blank text cells get code -1. Cells are never
+    put in a fixed-width unicode array, where one long cell would size every
+    row of its column.
+    """
+
+    def __init__(self, names, columns, row_count, updated_at):
+        self.names = names
+        self.columns = columns
+        self.row_count = row_count
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_csv(cls, handle, updated_at):
+        reader = csv.reader(handle)
+        names = next(reader, [])
+        width = len(names)
+        cells = [[] for _ in names]
+        # Transpose a chunk at a time: holding every row list at once makes the
+        # cyclic GC rescan them over and over and triples the build time.
+        while True:
+            chunk = list(itertools.islice(reader, 1024))
+            if not chunk:
+                break
+            if any(len(row) != width for row in chunk):
+                chunk = [row if len(row) == width else (row + [""] * width)[:width] for row in chunk]
+            for column, values in zip(cells, zip(*chunk)):
+                column.extend(values)
+        columns = {name: cls._infer(values) for name, values in zip(names, cells)}
+        return cls(names, columns, len(cells[0]) if cells else 0, updated_at)
+
+    @staticmethod
+    def _infer(raw):
+        present = [value for value in raw if value != ""]
+        try:
+            parsed = np.fromiter(map(float, present), dtype=np.float64, count=len(present))
+        except ValueError:
+            parsed = None
+        # "inf" and "nan" cells make a text column, as in _as_number.
+        if parsed is None or not np.isfinite(parsed).all():
+            categories = sorted(set(present))
+            index = {value: code for code, value in enumerate(categories)}
+            codes = np.fromiter((index.get(value, -1) for value in raw), dtype=np.int32, count=len(raw))
+            return {"type": "text", "codes": codes, "categories": np.array(categories, dtype=object)}
+        numbers = np.full(len(raw), np.nan)
+        numbers[np.fromiter((value != "" for value in raw), dtype=bool, count=len(raw))] = parsed
+        whole = parsed.size > 0 and bool(np.all(np.mod(parsed, 1) == 0))
+        return {"type": "integer" if whole else "float", "values": numbers}
+
+    @property
+    def nbytes(self):
+        """Memory held by the column arrays, including the text categories' strings."""
+        total = 0
+        for column in self.columns.values():
+            if column["type"] == "text":
+                categories = column["categories"]
+                total += column["codes"].nbytes + categories.nbytes + sum(map(sys.getsizeof, categories))
+            else:
+                total += column["values"].nbytes
+        return total
+
+    def summary(self, names=None, quantiles=(0.25, 0.5, 0.75), group_by=None, top=10):
+        names = names or self.names
+        unknown = [name for name in names + ([group_by] if group_by else []) if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(dict.fromkeys(unknown))}")
+        return {
+            "row_count": self.row_count,
+            "columns": [self._summarize(name, quantiles, top) for name in names],
+            "group_by": self._group_counts(group_by, top) if group_by else None,
+        }
+
+    def _summarize(self, name, quantiles, top):
+        column = self.columns[name]
+        if column["type"] == "text":
+            codes = column["codes"]
+            present = codes[codes >= 0]
+            return {
+                "name": name,
+                "type": "text",
+                "count": int(present.size),
+                "missing": int(self.row_count - present.size),
+                "distinct": int(len(column["categories"])),
+                "top": self._top_codes(column, present, top),
+            }
+        values = column["values"]
+        present = values[~np.isnan(values)]
+        summary = {
+            "name": name,
+            "type": column["type"],
+            "count": int(present.size),
+            "missing": int(self.row_count - present.size),
+            "min": None,
+            "max": None,
+            "mean": None,
+            "quantiles": {},
+        }
+        if present.size:
+            # Values near the float64 limits can overflow the mean; those become null.
+            with np.errstate(over="ignore", invalid="ignore"):
+                points = np.quantile(present, quantiles)
+                mean = present.mean()
+            scalar = int if column["type"] == "integer" else float
+            summary.update(
+                min=scalar(present.min()),
+                max=scalar(present.max()),
+                mean=_finite_or_none(mean),
+                quantiles={str(q): _finite_or_none(point) for q, point in zip(quantiles, points)},
+            )
+        return summary
+
+    @staticmethod
+    def _top_codes(column, present, top):
+        counts = np.bincount(present, minlength=len(column["categories"]))
+        order = np.argsort(-counts, kind="stable")[:top]
+        return [
+            {"value": str(column["categories"][code]), "count": int(counts[code])}
+            for code in order
+            if counts[code]
+        ]
+
+    def _group_counts(self, name, top):
+        column = self.columns[name]
+        if column["type"] == "text":
+            codes = column["codes"]
+            groups = self._top_codes(column, codes[codes >= 0], top)
+            missing = int(np.count_nonzero(codes < 0))
+        else:
+            values = column["values"]
+            present = values[~np.isnan(values)]
+            keys, counts = np.unique(present, return_counts=True)
+            order = np.argsort(-counts, kind="stable")[:top]
+            scalar = int if column["type"] == "integer" else float
+            groups = [{"value": scalar(keys[index]), "count": int(counts[index])} for index in order]
+            missing = int(self.row_count - present.size)
+        return {"column": name, "groups": groups, "missing": missing}
+
+
+def _finite_or_none(value):
+    """A float for JSON, or None where it would be Infinity/NaN (e.g. a mean that overflowed)."""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+_columnar_cache = ResultsCache(max_entries=RESULTS_COLUMNAR_CACHE_ENTRIES)
+
+
+def _load_columnar_table(thread_id):
+    """The thread's Results.csv as a ColumnarTable, rebuilt only when the file changes."""
+    csv_path = _results_csv_path(thread_id)
+    if not csv_path:
+        return None
+    try:
+        with open(csv_path, "r", newline="") as handle:
+            stat = os.fstat(handle.fileno())
+            key = (csv_path, stat.st_mtime_ns, stat.st_size)
+            table = _columnar_cache.get(key)
+            if table is None:
+                table = ColumnarTable.from_csv(handle, stat.st_mtime_ns // 1_000_000)
+                _columnar_cache.put(key, table, table.nbytes)
+            return table
+    except FileNotFoundError:
+        return None
+
+
+def _results_response(thread_id, build, empty):
+    """JSON from build() with validators taken from the thread's Results.csv.
+
+    A poll for an unchanged table is answered with 304 before the CSV is read
+    or parsed. ValueError from build() becomes a 400.
+    """
+    stat = _results_stat(thread_id)
+    if stat is None:
+        return jsonify(empty), 200
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = app.response_class(status=304)
+    else:
+        try:
+            response = jsonify(build())
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _page_limit(default):
+    """Read ?limit= clamped to [1, CHAT_PAGE_MAX]; None if it is not an integer."""
+    value = request.args.get("limit")
+    if value is None or value == "":
+        return default
+    try:
+        return max(1, min(int(value), CHAT_PAGE_MAX))
+    except ValueError:
+        return None
+
+
+def _encode_thread_cursor(row):
+    raw = json.dumps([row["updated_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_thread_cursor(value):
+    """Return (updated_at, id) from an opaque thread-list cursor, or None."""
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        updated_at, thread_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(updated_at, str) or not isinstance(thread_id, int):
+        return None
+    return updated_at, thread_id
+
+
+def _message_cursor(name):
+    """Read a message id cursor (?before= / ?after=); None if absent, False if invalid."""
+    value = request.args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return False
+
+
+def serialize_thread(row):
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "last_message": row["last_message"] or "",
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def _next_sync_seq(conn):
+    """Allocate the next chat sync sequence number inside the caller's write transaction."""
+    conn.execute("UPDATE chat_sync_sequence SET value = value + 1 WHERE id = 1")
+    return conn.execute("SELECT value FROM chat_sync_sequence WHERE id = 1").fetchone()[0]
+
+
+def _sync_watermark(conn):
+    return conn.execute("SELECT value FROM chat_sync_sequence WHERE id = 1").fetchone()[0]
+
+
+def _chat_changes_since(conn, user_id, since, limit):
+    """Threads written and deleted after watermark `since`, in sync_seq order.
+
+    Returns (threads, deleted_ids, watermark, has_more). The watermark is read
+    before the changes, so a change committed in between is at worst sent
+    twice, never skipped. When more than `limit` changes are pending the
+    watermark stops at the last one returned and has_more is set.
+    """
+    watermark = _sync_watermark(conn)
+    threads = conn.execute(
+        """
+        SELECT id, title, last_message, created_at, updated_at, sync_seq
+        FROM chat_threads
+        WHERE user_id = ? AND sync_seq > ?
+        ORDER BY sync_seq ASC
+        LIMIT ?
+        """,
+        (user_id, since, limit + 1),
+    ).fetchall()
+    tombstones = conn.execute(
+        """
+        SELECT thread_id, sync_seq
+        FROM chat_thread_tombstones
+        WHERE user_id = ? AND sync_seq > ?
+        ORDER BY sync_seq ASC
+        LIMIT ?
+        """,
+        (user_id, since, limit + 1),
+    ).fetchall()
+    changes = sorted(
+        [(row["sync_seq"], row, None) for row in threads] + [(row["sync_seq"], None, row["thread_id"]) for row in tombstones],
+        key=lambda change: change[0],
+    )
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+        watermark = changes[-1][0]
+    # A thread deleted between the two reads shows up in both; the delete wins.
+    deleted = [thread_id for seq, row, thread_id in changes if row is None]
+    deleted_ids = set(deleted)
+    changed = [row for seq, row, thread_id in changes if row is not None and row["id"] not in deleted_ids]
+    return changed, deleted, watermark, has_more
+
+
+def _thread_has_message(conn, thread_id, condition, message_id):
+    row = conn.execute(
+        f"SELECT EXISTS (SELECT 1 FROM chat_messages WHERE thread_id = ? AND {condition})",
+        (thread_id, message_id),
+    ).fetchone()
+    return bool(row[0])
+
+
 def require_user_id():
     user = get_user_from_token()
     if not user or not user.get("id"):
@@ -315,6 +1278,7 @@ def update_user_google(user_id, google_sub):
             (google_sub, "google", user_id),
         )
         conn.commit()
+    invalidate_user_cache(user_id)
 
 
 def store_reset_token(user_id, token_hash, expires_at):
@@ -324,6 +1288,7 @@ def store_reset_token(user_id, token_hash, expires_at):
             (token_hash, expires_at, user_id),
         )
         conn.commit()
+    invalidate_user_cache(user_id)
 
 
 def clear_reset_token(user_id):
@@ -333,11 +1298,12 @@ def clear_reset_token(user_id):
             (user_id,),
         )
         conn.commit()
+    invalidate_user_cache(user_id)
 
 
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "ok"}), 200
+    return jsonify({"status": "ok", "password_hashing": _password_hash_pool.snapshot()}), 200
 
 
 @app.route("/api/auth/signup", methods=["POST"])
@@ -355,7 +1321,10 @@ def auth_signup():
     if get_user_by_email(email):
         return jsonify({"error": "Account already exists"}), 409
 
-    password_hash = generate_password_hash(password)
+    try:
+        password_hash = hash_password(password)
+    except PasswordHashBusy:
+        return password_busy_response()
     created_at = datetime.now(timezone.utc).isoformat()
 
     with get_db_connection() as conn:
@@ -384,7 +1353,11 @@ def auth_login():
     if not user or not user["password_hash"]:
         return jsonify({"error": "Invalid email or password"}), 401
 
-    if not check_password_hash(user["password_hash"], password):
+    try:
+        valid = verify_password(user["password_hash"], password)
+    except PasswordHashBusy:
+        return password_busy_response()
+    if not valid:
         return jsonify({"error": "Invalid email or password"}), 401
 
     token = create_access_token(user)
@@ -463,14 +1436,17 @@ def auth_reset():
     if int(expires_at) < int(datetime.now(timezone.utc).timestamp()):
         return jsonify({"error": "Reset token expired"}), 400
 
-    new_hash = generate_password_hash(password)
+    try:
+        new_hash = hash_password(password)
+    except PasswordHashBusy:
+        return password_busy_response()
     with get_db_connection() as conn:
         conn.execute(
             "UPDATE users SET password_hash = ? WHERE id = ?",
             (new_hash, user["id"]),
         )
         conn.commit()
-    clear_reset_token(user["id"])
+    clear_reset_token(user["id"])  # also drops the user's cached row and token claims
 
     return jsonify({"message": "Password updated"}), 200
 
@@ -560,38 +1536,76 @@ def chats_collection():
         with get_chat_db_connection() as conn:
             cursor = conn.execute(
                 """
-                INSERT INTO chat_threads (user_id, title, last_message, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO chat_threads (user_id, title, last_message, created_at, updated_at, sync_seq)
+                VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (user_id, title, "", now, now),
+                (user_id, title, "", now, now, _next_sync_seq(conn)),
             )
             conn.commit()
             thread_id = cursor.lastrowid
 
         return jsonify({"id": thread_id, "title": title, "created_at": now, "updated_at": now}), 201
 
+    # Keyset pagination over (updated_at, id), newest first. ?before=<cursor>
+    # continues towards older threads, ?after=<cursor> fetches threads updated
+    # since the cursor; next_cursor continues in the same direction.
+    limit = _page_limit(CHAT_LIST_PAGE_SIZE)
+    if limit is None:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    # Delta sync: ?since=<watermark> from an earlier reply returns only the
+    # threads written and the ids deleted since then.
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": "Invalid watermark"}), 400
+        with get_chat_db_connection() as conn:
+            changed, deleted, watermark, has_more = _chat_changes_since(conn, user_id, since, limit)
+        changed.sort(key=lambda row: (row["updated_at"], row["id"]), reverse=True)
+        return jsonify(
+            {
+                "threads": [serialize_thread(row) for row in changed],
+                "deleted": deleted,
+                "watermark": watermark,
+                "has_more": has_more,
+            }
+        ), 200
+
+    before = request.args.get("before")
+    after = request.args.get("after")
+    if before and after:
+        return jsonify({"error": "Use either before or after, not both"}), 400
+    cursor = _decode_thread_cursor(before or after) if (before or after) else None
+    if (before or after) and cursor is None:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    query = "SELECT id, title, last_message, created_at, updated_at FROM chat_threads WHERE user_id = ?"
+    params = [user_id]
+    if after:
+        query += " AND (updated_at, id) > (?, ?) ORDER BY updated_at ASC, id ASC LIMIT ?"
+        params += [cursor[0], cursor[1], limit + 1]
+    elif before:
+        query += " AND (updated_at, id) < (?, ?) ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params += [cursor[0], cursor[1], limit + 1]
+    else:
+        query += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
     with get_chat_db_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT id, title, last_message, created_at, updated_at
-            FROM chat_threads
-            WHERE user_id = ?
-            ORDER BY updated_at DESC
-            """,
-            (user_id,),
-        ).fetchall()
+        watermark = _sync_watermark(conn)
+        rows = conn.execute(query, params).fetchall()
 
-    threads = [
-        {
-            "id": row["id"],
-            "title": row["title"],
-            "last_message": row["last_message"] or "",
-            "created_at": row["created_at"],
-            "updated_at": row["updated_at"],
-        }
-        for row in rows
-    ]
-    return jsonify({"threads": threads}), 200
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_thread_cursor(rows[-1]) if has_more else None
+    if after:
+        rows.reverse()
+
+    threads = [serialize_thread(row) for row in rows]
+    return jsonify(
+        {"threads": threads, "has_more": has_more, "next_cursor": next_cursor, "watermark": watermark}
+    ), 200
 
 
 @app.route("/api/chats/<int:thread_id>", methods=["GET", "DELETE"])
@@ -609,6 +1623,10 @@ def chat_detail(thread_id):
             if not thread:
                 return jsonify({"error": "Chat not found"}), 404
 
+            conn.execute(
+                "DELETE FROM chat_message_attachments WHERE thread_id = ?",
+                (thread_id,),
+            )
             conn.execute(
                 "DELETE FROM chat_messages WHERE thread_id = ?",
                 (thread_id,),
@@ -617,10 +1635,30 @@ def chat_detail(thread_id):
                 "DELETE FROM chat_threads WHERE id = ? AND user_id = ?",
                 (thread_id, user_id),
             )
+            _thread_owner_cache.discard(thread_id)
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO chat_thread_tombstones (thread_id, user_id, sync_seq, deleted_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (thread_id, user_id, _next_sync_seq(conn), datetime.now(timezone.utc).isoformat()),
+            )
             conn.commit()
 
         return jsonify({"deleted": True, "id": thread_id}), 200
 
+    # Messages come back oldest first. Without cursors this is the latest page;
+    # ?before=<message id> pages back through older history and
+    # ?after=<message id> fetches what was posted since.
+    limit = _page_limit(CHAT_MESSAGES_PAGE_SIZE)
+    before = _message_cursor("before")
+    after = _message_cursor("after")
+    if limit is None or before is False or after is False:
+        return jsonify({"error": "Invalid limit or cursor"}), 400
+    if before is not None and after is not None:
+        return jsonify({"error": "Use either before or after, not both"}), 400
+    has_older = has_newer = False
+
     with get_chat_db_connection() as conn:
         thread = conn.execute(
             """
@@ -634,25 +1672,43 @@ def chat_detail(thread_id):
         if not thread:
             return jsonify({"error": "Chat not found"}), 404
 
-        messages = conn.execute(
-            """
-            SELECT id, role, content, source, response_id, created_at
-            FROM chat_messages
-            WHERE thread_id = ?
-            ORDER BY id ASC
-            """,
-            (thread_id,),
-        ).fetchall()
-
-        attachments = conn.execute(
-            """
-            SELECT id, message_id, filename, mime_type, size, created_at
-            FROM chat_message_attachments
-            WHERE thread_id = ?
-            ORDER BY id ASC
-            """,
-            (thread_id,),
-        ).fetchall()
+        query = "SELECT id, role, content, source, response_id, created_at FROM chat_messages WHERE thread_id = ?"
+        if after is not None:
+            messages = conn.execute(
+                query + " AND id > ? ORDER BY id ASC LIMIT ?",
+                (thread_id, after, limit + 1),
+            ).fetchall()
+            has_newer = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            params = (thread_id, limit + 1)
+            if before is not None:
+                query += " AND id < ?"
+                params = (thread_id, before, limit + 1)
+            messages = conn.execute(query + " ORDER BY id DESC LIMIT ?", params).fetchall()
+            has_older = len(messages) > limit
+            messages = messages[:limit][::-1]
+
+        attachments = []
+        if messages:
+            first_id, last_id = messages[0]["id"], messages[-1]["id"]
+            if after is not None:
+                has_older = _thread_has_message(conn, thread_id, "id < ?", first_id)
+            else:
+                has_newer = _thread_has_message(conn, thread_id, "id > ?", last_id)
+            attachments = conn.execute(
+                """
+                SELECT id, message_id, filename, mime_type, size, created_at
+                FROM chat_message_attachments
+                WHERE thread_id = ? AND message_id BETWEEN ? AND ?
+                ORDER BY message_id ASC, id ASC
+                """,
+                (thread_id, first_id, last_id),
+            ).fetchall()
+        elif after is not None:
+            has_older = _thread_has_message(conn, thread_id, "id <= ?", after)
+        else:
+            has_newer = before is not None and _thread_has_message(conn, thread_id, "id >= ?", before)
 
     attachments_by_message = {}
     for row in attachments:
@@ -668,13 +1724,7 @@ def chat_detail(thread_id):
 
     return jsonify(
         {
-            "thread": {
-                "id": thread["id"],
-                "title": thread["title"],
-                "last_message": thread["last_message"] or "",
-                "created_at": thread["created_at"],
-                "updated_at": thread["updated_at"],
-            },
+            "thread": serialize_thread(thread),
             "messages": [
                 {
                     "id": row["id"],
@@ -687,6 +1737,8 @@ def chat_detail(thread_id):
                 }
                 for row in messages
             ],
+            "has_older": has_older,
+            "has_newer": has_newer,
         }
     ), 200
 
@@ -697,16 +1749,50 @@ def chat_results(thread_id):
     if not user_id:
         return jsonify({"error": "Unauthorized"}), 401
 
-    with get_chat_db_connection() as conn:
-        thread = conn.execute(
-            "SELECT id FROM chat_threads WHERE id = ? AND user_id = ?",
-            (thread_id, user_id),
-        ).fetchone()
+    if not user_owns_thread(thread_id, user_id):
+        return jsonify({"error": "Chat not found"}), 404
 
-    if not thread:
+    if any(name in request.args for name in RESULTS_QUERY_PARAMS):
+        return _results_response(
+            thread_id,
+            lambda: _query_results_table(thread_id, _parse_results_query(request.args)),
+            {"columns": [], "rows": [], "updated_at": None, "total": 0, "has_more": False},
+        )
+    return _results_response(
+        thread_id,
+        lambda: _load_results_table(thread_id),
+        {"columns": [], "rows": [], "updated_at": None},
+    )
+
+
+@app.route("/api/chats/<int:thread_id>/results/summary", methods=["GET"])
+def chat_results_summary(thread_id):
+    user_id = require_user_id()
+    if not user_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if not user_owns_thread(thread_id, user_id):
         return jsonify({"error": "Chat not found"}), 404
 
-    return jsonify(_load_results_table(thread_id)), 200
+    def build():
+        columns = [column.strip() for column in (request.args.get("columns") or "").split(",") if column.strip()]
+        try:
+            quantiles = [float(value) for value in (request.args.get("quantiles") or "0.25,0.5,0.75").split(",")]
+            top = int(request.args.get("top") or 10)
+        except ValueError:
+            raise ValueError("quantiles must be numbers and top an integer")
+        if any(not 0 <= value <= 1 for value in quantiles) or top < 1:
+            raise ValueError("quantiles must be within [0, 1] and top >= 1")
+        table = _load_columnar_table(thread_id)
+        if table is None:
+            return {"row_count": 0, "columns": [], "group_by": None, "updated_at": None}
+        summary = table.summary(columns or None, quantiles, request.args.get("group_by") or None, top)
+        summary["updated_at"] = table.updated_at
+        return summary
+
+    return _results_response(
+        thread_id, build, {"row_count": 0, "columns": [], "group_by": None, "updated_at": None}
+    )
 
 
 @app.route("/api/chats/<int:thread_id>/messages", methods=["POST"])
@@ -761,10 +1847,10 @@ def chat_messages(thread_id):
         conn.execute(
             """
             UPDATE chat_threads
-            SET last_message = ?, updated_at = ?
+            SET last_message = ?, updated_at = ?, sync_seq = ?
             WHERE id = ?
             """,
-            (content[:200], now, thread_id),
+            (content[:200], now, _next_sync_seq(conn), thread_id),
         )
 
         allowed_types = {"image/png", "image/jpeg", "image/webp", "image/jpg"}
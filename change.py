@@ -3,19 +3,112 @@ WebSocket server that watches pipeline files and streams updates to clients.
 
 - output/artifacts/<thread>/ProcessLogs.md → plain appended logs
 - output/artifacts/<thread>/Results.csv     → structured table for results panel
+
+On connect the server sends {"type": "hello", "epoch": ..., "seq": ...}. Clients
+choose which chat threads they receive by sending JSON commands:
+
+- {"type": "subscribe", "thread_id": "12"}            → add a thread
+- {"type": "subscribe", "thread_ids": [...], "replace": true} → set the thread list
+- {"type": "subscribe", "thread_id": "12", "last_seq": 41, "epoch": "..."} → resume
+- {"type": "unsubscribe", "thread_id": "12"}          → drop a thread (omit to drop all)
+- {"type": "resync", "thread_id": "12"}               → resend the full results table
+- {"type": "stats"}                                   → queue depth, drop and watcher counters
+
+Subscription commands are acknowledged with {"type": "subscriptions", "thread_ids": [...]}.
+Events without a thread (global logs/results) are sent to every client.
+
+Every event carries a "seq" that increases across the whole server. Each
+thread's recent frames are kept in a bounded replay buffer: a client that
+resubscribes with the epoch from "hello" and the last seq it saw receives
+exactly the frames it missed. If the buffer no longer reaches back that far,
+the epoch changed, or no last_seq was given, it gets one "type": "snapshot"
+message (current results table plus a log tail) instead, followed by live
+frames newer than the snapshot's seq. "last_seq" may also be a
+{thread_id: seq} object when subscribing to several threads. Buffers are
+bounded per thread (AGENT_WS_REPLAY_EVENTS, AGENT_WS_REPLAY_BYTES) and in
+total (AGENT_WS_REPLAY_TOTAL_BYTES, default 64 MiB, counting the parsed event
+and every cached encoding); a thread's buffer is dropped when its watch grace
+period expires.
+
+Results are streamed incrementally: an "op": "snapshot" message carries every
+row, and later "op": "append" messages carry only the newly written rows. Both
+carry "columns" and a per-file "table_seq"; a client that sees a gap (or an
+append before any snapshot) should send "resync".
+
+The row layout is negotiated with the connection URL's query string:
+?format=json (default) sends each row as an object, ?format=columnar sends
+rows as arrays in "columns" order, and ?format=msgpack sends columnar frames as
+binary MessagePack (falling back to columnar JSON if msgpack is not installed).
+"hello" reports the encoding in use. permessage-deflate is tuned with
+AGENT_WS_DEFLATE_LEVEL, AGENT_WS_DEFLATE_WINDOW_BITS and AGENT_WS_DEFLATE_MEM_LEVEL
+(AGENT_WS_DEFLATE=false disables it).
+
+Each client's outbox holds at most AGENT_WS_CLIENT_QUEUE_MAX frames before
+queued log chunks are merged and superseded results snapshots dropped; a
+client that stays behind for AGENT_WS_SLOW_CLIENT_SECONDS is closed with code
+1013 and is expected to reconnect and resume.
+
+Watchdog callbacks are coalesced per path for AGENT_WS_COALESCE_MS (default 30)
+before files are read. Frames are published in the order the paths were
+drained; consecutive log chunks for the same thread in one window are sent as
+a single frame, but never merged across that thread's results frames. Logs are tailed by byte offset and sent in chunks of
+at most AGENT_WS_LOG_CHUNK_BYTES (default 64 KiB, counted in characters).
+
+Only thread directories with at least one subscriber are watched; a watch is
+dropped AGENT_WS_UNWATCH_GRACE_SECONDS (default 30) after the last subscriber
+leaves. Thread ids must match [A-Za-z0-9_-][A-Za-z0-9_.-]*.
+
+AGENT_WS_WATCH_BACKEND=poll replaces inotify with stat() polling for NFS and
+other network filesystems; busy directories are polled every
+AGENT_WS_POLL_MIN_MS (default 250) and idle ones back off to
+AGENT_WS_POLL_MAX_MS (default 5000), or longer when more than
+AGENT_WS_POLL_IDLE_BUDGET (default 200) idle directories per second would be
+polled.
+
+The server listens on AGENT_WS_HOST:AGENT_WS_PORT (default 0.0.0.0:8090). With
+AGENT_WS_WORKERS=N (N > 1) this process becomes the watcher: it watches,
+parses and sequences events once and relays them over a Unix socket
+(AGENT_WS_IPC_PATH) to N worker processes that share the port through
+SO_REUSEPORT and do the per-client encoding and socket writes. Workers tell the
+watcher which threads they have subscribers for and fetch snapshots from it;
+a worker that dies is restarted and its clients resume on another worker.
+
+GET /metrics on the same port returns Prometheus metrics (clients, subscribers
+per thread, outbox depth, watch events, CSV parse time, log bytes and the
+file-mtime-to-send latency); in worker mode any worker answers for all
+processes. AGENT_WS_METRICS=false turns it off.
 """
 
-import time
+import codecs
 import json
+import time
+import secrets
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
 import threading
 import asyncio
 import websockets
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-import queue
+from watchdog.events import DirCreatedEvent, FileModifiedEvent, FileSystemEventHandler
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+from collections import OrderedDict, deque
+from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 import csv
+import hashlib
+import heapq
 import os
+import re
+import sqlite3
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 DEFAULT_PIPELINE_ROOT = Path(__file__).resolve().parents[1] / "3GPP-pipeline"
 PIPELINE_ROOT = Path(os.getenv("PIPELINE_ROOT", DEFAULT_PIPELINE_ROOT)).resolve()
@@ -23,34 +116,887 @@ ARTIFACTS_DIR = Path(
     os.getenv("PIPELINE_ARTIFACTS_DIR") or (PIPELINE_ROOT / "output" / "artifacts")
 ).resolve()
 ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+COALESCE_WINDOW_SECONDS = max(0.0, float(os.getenv("AGENT_WS_COALESCE_MS", "30")) / 1000)
+REPLAY_MAX_EVENTS = int(os.getenv("AGENT_WS_REPLAY_EVENTS", "256"))
+REPLAY_MAX_BYTES = int(os.getenv("AGENT_WS_REPLAY_BYTES", str(4 * 1024 * 1024)))
+REPLAY_MAX_THREADS = int(os.getenv("AGENT_WS_REPLAY_THREADS", "1024"))
+REPLAY_TOTAL_BYTES = int(os.getenv("AGENT_WS_REPLAY_TOTAL_BYTES", str(64 * 1024 * 1024)))
+CLIENT_QUEUE_MAX = int(os.getenv("AGENT_WS_CLIENT_QUEUE_MAX", "256"))
+SLOW_CLIENT_SECONDS = float(os.getenv("AGENT_WS_SLOW_CLIENT_SECONDS", "15"))
+LOG_CHUNK_BYTES = max(1024, int(os.getenv("AGENT_WS_LOG_CHUNK_BYTES", str(64 * 1024))))
+UNWATCH_GRACE_SECONDS = float(os.getenv("AGENT_WS_UNWATCH_GRACE_SECONDS", "30"))
+FILE_STATE_DB_PATH = Path(
+    os.getenv("AGENT_WS_STATE_DB_PATH") or (Path(__file__).resolve().parent / "agent_ws_state.db")
+)
+FILE_STATE_MAX_ENTRIES = int(os.getenv("AGENT_WS_FILE_STATE_MAX", "512"))
+FILE_STATE_IDLE_SECONDS = float(os.getenv("AGENT_WS_FILE_STATE_IDLE_SECONDS", "3600"))
+FILE_STATE_RETENTION_DAYS = float(os.getenv("AGENT_WS_FILE_STATE_RETENTION_DAYS", "30"))
+# Bytes before a Results.csv offset that must be unchanged for new bytes to count as appended rows.
+RESULTS_FINGERPRINT_BYTES = 4096
+SNAPSHOT_LOG_TAIL_BYTES = int(os.getenv("AGENT_WS_SNAPSHOT_LOG_BYTES", str(16 * 1024)))
+WATCH_BACKEND = os.getenv("AGENT_WS_WATCH_BACKEND", "native").strip().lower()
+POLL_MIN_SECONDS = max(0.05, float(os.getenv("AGENT_WS_POLL_MIN_MS", "250")) / 1000)
+POLL_MAX_SECONDS = max(POLL_MIN_SECONDS, float(os.getenv("AGENT_WS_POLL_MAX_MS", "5000")) / 1000)
+POLL_IDLE_BUDGET = max(1.0, float(os.getenv("AGENT_WS_POLL_IDLE_BUDGET", "200")))
+THREAD_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]*")
+WIRE_ENCODINGS = ("json", "columnar", "msgpack")
+SERVER_HOST = os.getenv("AGENT_WS_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("AGENT_WS_PORT", "8090"))
+WORKER_COUNT = max(1, int(os.getenv("AGENT_WS_WORKERS", "1")))
+PROCESS_ROLE = os.getenv("AGENT_WS_ROLE") or ("watcher" if WORKER_COUNT > 1 else "single")
+IPC_PATH = os.getenv("AGENT_WS_IPC_PATH") or os.path.join(tempfile.gettempdir(), f"agent-ws-{SERVER_PORT}.sock")
+IPC_MAX_BUFFER_BYTES = int(os.getenv("AGENT_WS_IPC_MAX_BUFFER", str(64 * 1024 * 1024)))
+IPC_HEADER = struct.Struct(">IB")
+IPC_EVENT_MTIME = struct.Struct(">d")
+METRICS_ENABLED = os.getenv("AGENT_WS_METRICS", "true").lower() in {"1", "true", "yes"}
+WORKER_INDEX = os.getenv("AGENT_WS_WORKER_INDEX")
+DEFLATE_ENABLED = os.getenv("AGENT_WS_DEFLATE", "true").lower() in {"1", "true", "yes"}
+DEFLATE_LEVEL = int(os.getenv("AGENT_WS_DEFLATE_LEVEL", "3"))
+DEFLATE_WINDOW_BITS = int(os.getenv("AGENT_WS_DEFLATE_WINDOW_BITS", "15"))
+DEFLATE_MEM_LEVEL = int(os.getenv("AGENT_WS_DEFLATE_MEM_LEVEL", "8"))
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram; observe() is safe from any thread."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def family(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        samples = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            samples.append(("_bucket", {"le": repr(float(bound))}, running))
+        samples.append(("_bucket", {"le": "+Inf"}, count))
+        samples.append(("_sum", {}, total))
+        samples.append(("_count", {}, count))
+        return _metric_family(self.name, "histogram", self.help, samples)
+
+
+def _metric_family(name, metric_type, help_text, samples):
+    """One metric in Prometheus terms; samples are (suffix, labels, value)."""
+    return {"name": name, "type": metric_type, "help": help_text, "samples": list(samples)}
+
+
+CSV_PARSE_SECONDS = Histogram(
+    "agent_ws_csv_parse_seconds",
+    "Time spent reading and parsing Results.csv records.",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DELIVERY_LATENCY_SECONDS = Histogram(
+    "agent_ws_delivery_latency_seconds",
+    "Time from the artifact file's mtime to the frame's first send to a client.",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class Frame:
+    """One outbound message; encoded once per wire encoding, however many clients receive it."""
+
+    __slots__ = ("event", "thread_id", "seq", "mtime", "_encoded", "_nbytes", "_sealed")
+
+    def __init__(self, event_data, encoded=None, mtime=None):
+        self.event = event_data
+        thread_id = event_data.get("thread_id")
+        self.thread_id = None if thread_id is None else str(thread_id)
+        self.seq = event_data.get("seq")
+        # mtime of the file the event was read from; cleared after the first send.
+        self.mtime = mtime
+        self._encoded = dict(encoded or {})
+        self._nbytes = None
+        self._sealed = False
+
+    def encode(self, encoding="json"):
+        message = self._encoded.get(encoding)
+        if message is None:
+            message = _encode_event(self.event, encoding)
+            if not self._sealed:
+                self._encoded[encoding] = message
+        return message
+
+    def seal(self):
+        """Freeze the cached encodings and return the bytes the frame holds.
+
+        Called before the frame enters a replay buffer so the size charged
+        there stays true: the parsed event plus every cached encoding. An
+        encoding first needed later (replaying to a client with another
+        encoding) is computed per send. A frame with no encoding gets columnar.
+        """
+        if self._nbytes is None:
+            if not self._encoded:
+                self.encode("columnar")
+            self._sealed = True
+            self._nbytes = _event_nbytes(self.event) + sum(len(message) for message in self._encoded.values())
+        return self._nbytes
+
+
+def _event_nbytes(event_data):
+    """Rough memory held by an event dict; results rows are sampled (at most 32)."""
+    total = sys.getsizeof(event_data)
+    for value in event_data.values():
+        if isinstance(value, dict):
+            total += _event_nbytes(value)
+        elif isinstance(value, list) and value and isinstance(value[0], list):
+            sample = value[:: max(1, len(value) // 32)]
+            sampled = sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in sample)
+            total += sys.getsizeof(value) + sampled * len(value) // len(sample)
+        elif isinstance(value, list):
+            total += sys.getsizeof(value) + sum(map(sys.getsizeof, value))
+        else:
+            total += sys.getsizeof(value)
+    return total
+
+
+def _encode_event(event_data, encoding):
+    """Serialize an event for a client's negotiated encoding.
+
+    Results rows are kept as lists internally. "json" expands them to one
+    object per row (the original format), "columnar" sends them as arrays
+    alongside "columns", and "msgpack" is columnar packed as a binary frame.
+    """
+    if encoding == "json":
+        event_data = _rows_as_objects(event_data)
+    if encoding == "msgpack":
+        return msgpack.packb(event_data, use_bin_type=True)
+    return json.dumps(event_data)
+
+
+def _rows_as_objects(event_data):
+    if event_data.get("type") == "snapshot" and event_data.get("results"):
+        return {**event_data, "results": _rows_as_objects(event_data["results"])}
+    if event_data.get("type") != "results":
+        return event_data
+    columns = event_data.get("columns") or []
+    width = len(columns)
+    rows = []
+    for values in event_data.get("rows", ()):
+        row = dict(zip(columns, values))
+        if len(values) < width:
+            row.update(dict.fromkeys(columns[len(values):]))
+        elif len(values) > width:
+            row[None] = values[width:]
+        rows.append(row)
+    return {**event_data, "rows": rows}
+
+
+class ReplayBuffer:
+    """Bounded history of one thread's frames, used to resume reconnecting clients.
+
+    floor is the highest seq that may have been dropped: a client whose last_seq
+    is below it has missed events and needs a snapshot instead of a replay.
+    """
+
+    __slots__ = ("frames", "size", "floor")
+
+    def __init__(self, floor):
+        self.frames = deque()
+        self.size = 0
+        self.floor = floor
+
+    def append(self, frame):
+        self.frames.append(frame)
+        self.size += frame.seal()
+        while self.frames and (len(self.frames) > REPLAY_MAX_EVENTS or self.size > REPLAY_MAX_BYTES):
+            dropped = self.frames.popleft()
+            self.size -= dropped.seal()
+            self.floor = dropped.seq
+
+    def since(self, last_seq):
+        if last_seq < self.floor:
+            return None
+        return [frame for frame in self.frames if frame.seq > last_seq]
+
+
+class ClientChannel:
+    """Per-connection outbox living on the event loop that serves the client.
+
+    While a snapshot is being built for a thread, live frames for it are held
+    back and released afterwards, minus the ones the snapshot already covers.
+
+    The outbox is bounded. When it grows past max_depth, pending log chunks are
+    merged per thread and results frames superseded by a newer snapshot are
+    dropped. A client that is still over the limit for longer than
+    SLOW_CLIENT_SECONDS, or reaches twice the limit, is closed; it can
+    reconnect and resume from its last seq.
+    """
+
+    def __init__(self, encoding="json", max_depth=CLIENT_QUEUE_MAX):
+        self.encoding = encoding
+        self.max_depth = max_depth
+        self.frames = deque()
+        self.ready = asyncio.Event()
+        self.held = {}
+        self.dropped = 0
+        self.overflow_since = None
+        self.close_reason = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def put(self, frame):
+        if self.close_reason:
+            return
+        self.frames.append(frame)
+        if len(self.frames) > self.max_depth:
+            self._apply_backpressure()
+        self.ready.set()
+
+    def deliver(self, frame):
+        held = self.held.get(frame.thread_id)
+        if held is not None:
+            held.append(frame)
+        else:
+            self.put(frame)
+
+    def hold(self, thread_id):
+        self.held.setdefault(thread_id, [])
+
+    def release(self, thread_id, seq):
+        for frame in self.held.pop(thread_id, ()):
+            if frame.seq > seq:
+                self.put(frame)
+
+    async def get(self):
+        """Next frame to send, or None once the channel has been closed as too slow."""
+        while not self.frames and not self.close_reason:
+            self.ready.clear()
+            await self.ready.wait()
+        if self.close_reason:
+            return None
+        frame = self.frames.popleft()
+        if self.overflow_since is not None and len(self.frames) <= self.max_depth:
+            self.overflow_since = None
+        return frame
+
+    def _apply_backpressure(self):
+        before = len(self.frames)
+        self.frames = _compact_frames(self.frames)
+        self.dropped += before - len(self.frames)
+        if len(self.frames) <= self.max_depth:
+            self.overflow_since = None
+            return
+        now = time.monotonic()
+        if self.overflow_since is None:
+            self.overflow_since = now
+        if len(self.frames) >= 2 * self.max_depth or now - self.overflow_since > SLOW_CLIENT_SECONDS:
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            self.close_reason = "client too slow"
+            self.ready.set()
+
+
+def _compact_frames(frames):
+    """Merge queued log chunks per thread and drop results superseded by a newer results snapshot.
+
+    Consecutive chunks of a thread are merged only up to LOG_CHUNK_BYTES each.
+    Snapshot frames carry the client's resync state (logs_tail, results), so
+    they are never dropped and nothing from the first one on is compacted.
+    """
+    frames = list(frames)
+    barrier = next(
+        (index for index, frame in enumerate(frames) if frame.event.get("type") == "snapshot"),
+        len(frames),
+    )
+    frames, tail = frames[:barrier], frames[barrier:]
+
+    latest_snapshot = {}
+    for index, frame in enumerate(frames):
+        if frame.event.get("type") == "results" and frame.event.get("op") == "snapshot":
+            latest_snapshot[frame.thread_id] = index
+
+    log_positions = {}
+    kept = []
+    for index, frame in enumerate(frames):
+        event_type = frame.event.get("type")
+        if event_type == "results" and index < latest_snapshot.get(frame.thread_id, -1):
+            continue
+        if event_type == "logs" and frame.seq is not None:
+            log_positions.setdefault(frame.thread_id, []).append(len(kept))
+        kept.append(frame)
+
+    for positions in log_positions.values():
+        run = []
+        run_size = 0
+        for position in positions + [None]:
+            size = len(kept[position].event.get("response", "")) if position is not None else 0
+            if position is not None and (not run or run_size + size <= LOG_CHUNK_BYTES):
+                run.append(position)
+                run_size += size
+                continue
+            if len(run) > 1:
+                chunks = [kept[index] for index in run]
+                kept[run[-1]] = Frame({
+                    **chunks[-1].event,
+                    "response": "".join(chunk.event.get("response", "") for chunk in chunks),
+                }, mtime=chunks[0].mtime)
+                for index in run[:-1]:
+                    kept[index] = None
+            run = [position]
+            run_size = size
+    kept.extend(tail)
+    return deque(frame for frame in kept if frame is not None)
+
+
+class ArtifactHub:
+    """Routes events from the shared watcher to the clients subscribed to their thread.
+
+    Events without a thread_id (global logs/results) go to every client.
+    publish() is called from the watchdog thread and hands each frame to the
+    event loop with call_soon_threadsafe, so delivery needs no polling. Every
+    published frame gets a process-wide, increasing seq and is kept in its
+    thread's ReplayBuffer so a reconnecting client can resume from last_seq.
+
+    _lock guards the client and subscriber tables and is also taken on the
+    event loop, so frames are encoded outside it; _publish_lock keeps
+    concurrent publishers routing frames in seq order.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(8)
+        self._clients = {}
+        self._subscribers = {}
+        self._replay = OrderedDict()
+        self._replay_bytes = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._loop = None
+        self.watch_manager = None
+        # Every event passes through this hub, so a client whose last_seq is
+        # at least the current seq has missed nothing, even without a buffer.
+        self.complete_history = True
+        self.counters = {"frames_dropped": 0, "slow_disconnects": 0}
+
+    def bind_loop(self, loop):
+        self._loop = loop
+
+    def register(self, encoding="json"):
+        client_queue = ClientChannel(encoding)
+        with self._lock:
+            self._clients[client_queue] = set()
+        return client_queue
+
+    def unregister(self, client_queue):
+        with self._lock:
+            self.counters["frames_dropped"] += client_queue.dropped
+            if client_queue.close_reason:
+                self.counters["slow_disconnects"] += 1
+            thread_ids = self._clients.pop(client_queue, set())
+            stopped = [
+                thread_id for thread_id in thread_ids if self._remove_subscriber(thread_id, client_queue)
+            ]
+        self._update_watches((), stopped)
+
+    def subscribe(self, client_queue, thread_ids, replace=False, resume=None, epoch=None):
+        """Subscribe and collect any replayable history.
+
+        resume maps thread_id to the client's last_seq. Returns the current
+        subscriptions, the frames to replay, and the threads that need a snapshot
+        because they were not resumed or fell out of the replay buffer; live
+        frames for those threads are held on the channel until the snapshot is
+        released. Must be called on the event loop, and the replay frames queued
+        before yielding to it, so no live frame can overtake them.
+        """
+        resume = resume or {}
+        replay = []
+        needs_snapshot = []
+        started = []
+        stopped = []
+        with self._lock:
+            current = self._clients.get(client_queue)
+            if current is None:
+                return set(), replay, needs_snapshot
+            if replace:
+                for thread_id in current - thread_ids:
+                    if self._remove_subscriber(thread_id, client_queue):
+                        stopped.append(thread_id)
+                current.intersection_update(thread_ids)
+            for thread_id in sorted(thread_ids - current):
+                if thread_id not in self._subscribers:
+                    started.append(thread_id)
+                self._subscribers.setdefault(thread_id, set()).add(client_queue)
+                frames = None
+                buffer = self._replay.get(thread_id)
+                last_seq = resume.get(thread_id)
+                if epoch == self.epoch and last_seq is not None:
+                    if buffer is not None:
+                        frames = buffer.since(last_seq)
+                    elif self.complete_history and last_seq >= self._seq:
+                        frames = []
+                if frames is None:
+                    client_queue.hold(thread_id)
+                    needs_snapshot.append(thread_id)
+                    continue
+                replay.extend(frames)
+            current.update(thread_ids)
+            subscriptions = set(current)
+        self._update_watches(started, stopped)
+        return subscriptions, replay, needs_snapshot
+
+    def unsubscribe(self, client_queue, thread_ids=None):
+        with self._lock:
+            current = self._clients.get(client_queue)
+            if current is None:
+                return set()
+            removed = set(current) if thread_ids is None else current & thread_ids
+            stopped = []
+            for thread_id in removed:
+                if self._remove_subscriber(thread_id, client_queue):
+                    stopped.append(thread_id)
+                client_queue.held.pop(thread_id, None)
+            current.difference_update(removed)
+            subscriptions = set(current)
+        self._update_watches((), stopped)
+        return subscriptions
+
+    def _remove_subscriber(self, thread_id, client_queue):
+        """Drop one subscriber; True when it was the thread's last one."""
+        subscribers = self._subscribers.get(thread_id)
+        if subscribers is None:
+            return False
+        subscribers.discard(client_queue)
+        if subscribers:
+            return False
+        del self._subscribers[thread_id]
+        return True
+
+    def _update_watches(self, started, stopped):
+        if self.watch_manager is None:
+            return
+        for thread_id in started:
+            self.watch_manager.acquire(thread_id)
+        for thread_id in stopped:
+            self.watch_manager.release(thread_id)
+
+    def is_subscribed(self, client_queue, thread_id):
+        if thread_id is None:
+            return True
+        with self._lock:
+            return thread_id in self._clients.get(client_queue, ())
+
+    def client_count(self):
+        with self._lock:
+            return len(self._clients)
+
+    def stats(self):
+        with self._lock:
+            channels = list(self._clients)
+            counters = dict(self.counters)
+        depths = [len(channel) for channel in channels]
+        counters["frames_dropped"] += sum(channel.dropped for channel in channels)
+        return {
+            "clients": len(channels),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            **counters,
+        }
+
+    def current_seq(self):
+        with self._lock:
+            return self._seq
+
+    def subscriber_counts(self):
+        with self._lock:
+            return {thread_id: len(channels) for thread_id, channels in self._subscribers.items()}
+
+    def queue_depths(self):
+        with self._lock:
+            channels = list(self._clients)
+        return [len(channel) for channel in channels]
+
+    def publish(self, event_data, mtime=None):
+        thread_id = event_data.get("thread_id")
+        key = None if thread_id is None else str(thread_id)
+        with self._publish_lock:
+            with self._lock:
+                self._seq += 1
+                event_data["seq"] = self._seq
+                encodings = {channel.encoding for channel in self._targets(key)}
+            # Encode only what the receiving clients negotiated, off _lock.
+            frame = Frame(event_data, mtime=mtime)
+            for encoding in encodings:
+                frame.encode(encoding)
+            frame.seal()
+            with self._lock:
+                targets = self._route(frame)
+            if not targets or self._loop is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(_deliver, targets, frame)
+            except RuntimeError:
+                # The event loop has already shut down.
+                pass
+
+    def _targets(self, thread_id):
+        if thread_id is None:
+            return list(self._clients)
+        return list(self._subscribers.get(thread_id, ()))
+
+    def _route(self, frame):
+        self._remember(frame.thread_id, frame)
+        return self._targets(frame.thread_id)
+
+    def _remember(self, thread_id, frame):
+        buffer = self._replay.get(thread_id)
+        if buffer is None:
+            buffer = self._replay[thread_id] = ReplayBuffer(floor=frame.seq - 1)
+        else:
+            self._replay.move_to_end(thread_id)
+        before = buffer.size
+        buffer.append(frame)
+        self._replay_bytes += buffer.size - before
+        # The least recently written threads go first; resuming them falls back to a snapshot.
+        while len(self._replay) > 1 and (
+            len(self._replay) > REPLAY_MAX_THREADS or self._replay_bytes > REPLAY_TOTAL_BYTES
+        ):
+            _, evicted = self._replay.popitem(last=False)
+            self._replay_bytes -= evicted.size
+
+    def drop_replay(self, thread_id):
+        """Free a thread's replay buffer once nobody is subscribed (its watch grace expired)."""
+        with self._lock:
+            if thread_id not in self._subscribers:
+                self._drop_replay(thread_id)
+
+    def _drop_replay(self, thread_id):
+        buffer = self._replay.pop(thread_id, None)
+        if buffer is not None:
+            self._replay_bytes -= buffer.size
+
+
+def _deliver(channels, frame):
+    for channel in channels:
+        channel.deliver(frame)
+
+
+class RelayHub(ArtifactHub):
+    """Worker-process hub in AGENT_WS_WORKERS mode.
+
+    Frames arrive already sequenced from the watcher process through ingest(),
+    on the event loop. The watcher only forwards a thread's events while this
+    worker has subscribers for it, so a thread's replay buffer is dropped when
+    its last local subscriber leaves and resuming without a buffer always
+    falls back to a snapshot.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.complete_history = False
+        self.upstream = None
+
+    def ingest(self, frame):
+        # Encode for the local subscribers before the frame is sealed into the
+        # replay buffer, so their encodings are cached and charged to it.
+        with self._lock:
+            self._seq = max(self._seq, frame.seq)
+            encodings = {channel.encoding for channel in self._targets(frame.thread_id)}
+        for encoding in encodings:
+            frame.encode(encoding)
+        frame.seal()
+        with self._lock:
+            targets = self._route(frame)
+        _deliver(targets, frame)
+
+    def _update_watches(self, started, stopped):
+        if stopped:
+            with self._lock:
+                for thread_id in stopped:
+                    if thread_id not in self._subscribers:
+                        self._drop_replay(thread_id)
+        super()._update_watches(started, stopped)
+
+
+class EventCoalescer:
+    """Collects watchdog callbacks per path and flushes each path once per window.
+
+    A pipeline flush usually fires several modified/created/moved callbacks for
+    the same file; only the first one opens the window, and the batch is handed
+    to process_batch once it closes.
+    """
+
+    def __init__(self, process_batch, window=COALESCE_WINDOW_SECONDS):
+        self.process_batch = process_batch
+        self.window = window
+        self._pending = {}
+        self._deadline = None
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="agent-ws-coalescer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+
+    def submit(self, path):
+        with self._condition:
+            self._pending[path] = None
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.window
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopped:
+                    return
+                paths = list(self._pending)
+                self._pending.clear()
+                self._deadline = None
+            try:
+                self.process_batch(paths)
+            except Exception as exc:
+                print(f"Failed to process artifact events: {exc}")
+
+
+class FileStateStore:
+    """LRU table of per-file tailing state, spilling evicted entries to SQLite.
+
+    Each entry records the file identity (device, inode), the byte offset read
+    so far, its size and when it was last touched, plus kind-specific fields
+    (results columns and table_seq). At most max_entries stay in memory and
+    entries idle for idle_seconds are evicted; an evicted file is reloaded from
+    its persisted offset instead of being replayed from zero.
+    """
+
+    def __init__(self, db_path, max_entries=FILE_STATE_MAX_ENTRIES, idle_seconds=FILE_STATE_IDLE_SECONDS):
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_state (
+                path TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_seen REAL NOT NULL,
+                extra TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "DELETE FROM file_state WHERE last_seen < ?",
+            (time.time() - FILE_STATE_RETENTION_DAYS * 86400,),
+        )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, path):
+        key = str(path)
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                state = self._load(key)
+                if state is None:
+                    return None
+                self._entries[key] = state
+                self._evict_overflow()
+            else:
+                self._entries.move_to_end(key)
+            state["last_seen"] = time.time()
+            return state
+
+    def put(self, path, state):
+        key = str(path)
+        state["last_seen"] = time.time()
+        with self._lock:
+            self._entries[key] = state
+            self._entries.move_to_end(key)
+            self._evict_overflow()
+        return state
+
+    def pop(self, path):
+        key = str(path)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._conn.execute("DELETE FROM file_state WHERE path = ?", (key,))
+            self._conn.commit()
+
+    def evict_idle(self):
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            while self._entries:
+                key, state = next(iter(self._entries.items()))
+                if state["last_seen"] >= cutoff:
+                    break
+                self._entries.popitem(last=False)
+                self._persist(key, state)
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            for key, state in self._entries.items():
+                self._persist(key, state)
+            self._conn.commit()
+
+    def _evict_overflow(self):
+        evicted = False
+        while len(self._entries) > self.max_entries:
+            key, state = self._entries.popitem(last=False)
+            self._persist(key, state)
+            evicted = True
+        if evicted:
+            self._conn.commit()
+
+    def _persist(self, key, state):
+        offset = state["offset"]
+        extra = {}
+        if state["kind"] == "logs":
+            # Bytes still buffered in the decoder are re-read after a reload.
+            offset -= len(state["decoder"].getstate()[0])
+        else:
+            extra = {"columns": state["columns"], "seq": state["seq"], "fingerprint": state.get("fingerprint")}
+        dev, ino = state["identity"]
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO file_state (path, kind, dev, ino, offset, size, last_seen, extra)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (key, state["kind"], dev, ino, offset, state.get("size", offset), state["last_seen"], json.dumps(extra)),
+        )
+
+    def _load(self, key):
+        row = self._conn.execute(
+            "SELECT kind, dev, ino, offset, size, extra FROM file_state WHERE path = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        kind, dev, ino, offset, size, extra = row
+        state = {"kind": kind, "identity": (dev, ino), "offset": offset, "size": size}
+        if kind == "logs":
+            state["decoder"] = _utf8_decoder()
+        else:
+            state.update(json.loads(extra or "{}"))
+        return state
 
 
 class MyHandler(FileSystemEventHandler):
-    def __init__(self, message_queue):
+    def __init__(self, hub, coalesce_window=COALESCE_WINDOW_SECONDS):
         super().__init__()
-        self.message_queue = message_queue
-        self.log_offsets = {}
+        self.hub = hub
+        self.file_state = FileStateStore(FILE_STATE_DB_PATH)
+        self.watch_manager = None
+        self.results_lock = threading.Lock()
+        self.batch_lock = threading.Lock()
+        self.counters = {"events_received": 0, "paths_processed": 0, "batches": 0, "frames_emitted": 0, "log_bytes_read": 0}
+        self.event_types = {}
+        self.coalescer = EventCoalescer(self.process_batch, coalesce_window)
+
+    def on_any_event(self, event):
+        key = ("directory" if event.is_directory else "file", event.event_type)
+        self.event_types[key] = self.event_types.get(key, 0) + 1
 
     def on_modified(self, event):
-        self._handle_event(event.src_path)
+        self._submit(event, event.src_path)
 
     def on_created(self, event):
-        self._handle_event(event.src_path)
+        self._submit(event, event.src_path)
 
     def on_moved(self, event):
-        self._handle_event(event.dest_path)
+        self._submit(event, event.dest_path)
+
+    def _submit(self, event, src_path):
+        if event.is_directory:
+            if self.watch_manager is not None and event.event_type in {"created", "moved"}:
+                self.watch_manager.directory_created(Path(src_path).resolve())
+            return
+        self.counters["events_received"] += 1
+        self.coalescer.submit(src_path)
+
+    def process_batch(self, paths):
+        """Read each changed path once and publish its frames in the order they were read."""
+        with self.batch_lock:
+            self._process_batch(paths)
+
+    def _process_batch(self, paths):
+        frames = []
+        # The log frame of each thread that later chunks may still be merged into.
+        open_logs = {}
+        for src_path in paths:
+            mtime = _mtime(src_path)
+            for event_data in self._collect_events(src_path):
+                thread_id = event_data.get("thread_id")
+                if event_data["type"] != "logs":
+                    # Logs read after this frame must not be merged in ahead of it.
+                    open_logs.pop(thread_id, None)
+                    frames.append((event_data, mtime))
+                    continue
+                pending = open_logs.get(thread_id)
+                if pending is not None and len(pending["response"]) + len(event_data["response"]) <= LOG_CHUNK_BYTES:
+                    pending["response"] += event_data["response"]
+                    continue
+                open_logs[thread_id] = event_data
+                frames.append((event_data, mtime))
+
+        for event_data, mtime in frames:
+            self.hub.publish(event_data, mtime)
 
-    def _handle_event(self, src_path):
+        self.counters["batches"] += 1
+        self.counters["paths_processed"] += len(paths)
+        self.counters["frames_emitted"] += len(frames)
+        self.file_state.evict_idle()
+
+    def _collect_events(self, src_path):
         resolved_path = Path(src_path).resolve()
         file_info = self._classify_path(resolved_path)
         if not file_info:
-            return
+            return ()
 
         file_type, thread_id = file_info
+        if self.watch_manager is not None and not self.watch_manager.is_active(thread_id):
+            # Top-level ProcessLogs-<thread>.md files of threads nobody views.
+            return ()
         if file_type == "logs":
-            self.handle_logs(resolved_path, thread_id)
-        elif file_type == "results":
-            self.handle_results(resolved_path, thread_id)
+            return self.handle_logs(resolved_path, thread_id)
+        event_data = self.handle_results(resolved_path, thread_id)
+        return (event_data,) if event_data else ()
+
+    def wants(self, path: Path):
+        """True if path is an artifact file of a thread somebody is viewing."""
+        file_info = self._classify_path(path)
+        if not file_info:
+            return False
+        return self.watch_manager is None or self.watch_manager.is_active(file_info[1])
 
     def _classify_path(self, path: Path):
         name = path.name
@@ -75,83 +1021,1198 @@ class MyHandler(FileSystemEventHandler):
         return None
 
     def handle_logs(self, path: Path, thread_id):
+        """Yield log chunks appended since the last read, at most LOG_CHUNK_BYTES each.
+
+        Offsets are raw byte positions and text goes through a per-file
+        incremental UTF-8 decoder, so a character split across two writes is
+        emitted whole. A different device/inode or a shrinking file means the
+        log was replaced or truncated, and reading restarts from the beginning.
+        """
         try:
-            offset = self.log_offsets.get(path, 0)
-            if path.stat().st_size < offset:
-                offset = 0
-
-            with open(path, "r") as f:
-                f.seek(offset)
-                new_content = f.read()
-                self.log_offsets[path] = f.tell()
-
-            if new_content.strip():
-                self.message_queue.put({
-                    "type": "logs",
-                    "response": new_content,
-                    "thread_id": thread_id
-                })
+            stat = path.stat()
         except FileNotFoundError:
-            pass
+            self.file_state.pop(path)
+            return
+        state = self._log_state_for(path, stat)
+        end = stat.st_size
+        try:
+            with open(path, "rb") as f:
+                f.seek(state["offset"])
+                while state["offset"] < end:
+                    data = f.read(min(LOG_CHUNK_BYTES, end - state["offset"]))
+                    if not data:
+                        break
+                    state["offset"] += len(data)
+                    state["size"] = state["offset"]
+                    self.counters["log_bytes_read"] += len(data)
+                    new_content = state["decoder"].decode(data)
+                    if new_content.strip():
+                        yield {
+                            "type": "logs",
+                            "response": new_content,
+                            "thread_id": thread_id
+                        }
+        except FileNotFoundError:
+            self.file_state.pop(path)
+
+    def _log_state_for(self, path: Path, stat):
+        identity = (stat.st_dev, stat.st_ino)
+        state = self.file_state.get(path)
+        if state is None or state["identity"] != identity or stat.st_size < state["offset"]:
+            state = self.file_state.put(path, {
+                "kind": "logs",
+                "identity": identity,
+                "offset": 0,
+                "size": 0,
+                "decoder": _utf8_decoder(),
+            })
+        return state
 
     def handle_results(self, path: Path, thread_id):
+        with self.results_lock:
+            try:
+                return self._read_results(path, thread_id)
+            except FileNotFoundError:
+                self.file_state.pop(path)
+                return None
+
+    def results_snapshot(self, thread_id):
+        """Full table for a thread at the table_seq clients last saw.
+
+        If the file is new or changed shape, the fresh snapshot is published to
+        every subscriber instead and None is returned.
+        """
+        with self.results_lock:
+            snapshot, broadcast = self._results_table(thread_id)
+        if broadcast:
+            self.hub.publish(broadcast)
+        return snapshot
+
+    def thread_snapshot(self, thread_id):
+        """Current results table plus a log tail, consistent with the hub's seq.
+
+        Runs under batch_lock so nothing is read from disk between the offsets
+        used here and the seq reported to the client.
+        """
+        with self.batch_lock:
+            with self.results_lock:
+                results, broadcast = self._results_table(thread_id)
+            if broadcast:
+                self.hub.publish(broadcast)
+                results = broadcast
+            logs_tail = self._log_tail(thread_id)
+            seq = self.hub.current_seq()
+        return {
+            "type": "snapshot",
+            "thread_id": thread_id,
+            "seq": seq,
+            "epoch": self.hub.epoch,
+            "results": results,
+            "logs_tail": logs_tail,
+        }
+
+    def _results_table(self, thread_id):
+        for path in self._results_candidates(thread_id):
+            try:
+                state = self.file_state.get(path)
+                if state is None or self._results_changed_shape(path, state):
+                    broadcast = self._read_results(path, thread_id)
+                    if broadcast:
+                        return None, broadcast
+                    continue
+                with open(path, "rb") as f:
+                    f.readline()
+                    rows, _ = _read_csv_records(f, state["columns"], limit=state["offset"])
+            except FileNotFoundError:
+                self.file_state.pop(path)
+                continue
+            return self._results_event("snapshot", state, rows, thread_id), None
+        return None, None
+
+    def _log_tail(self, thread_id):
+        for path in self._log_candidates(thread_id):
+            try:
+                stat = path.stat()
+                state = self.file_state.get(path)
+                if state is None or state["identity"] != (stat.st_dev, stat.st_ino) or stat.st_size < state["offset"]:
+                    # Nothing streamed from this file yet: the tail becomes the starting point.
+                    state = self._log_state_for(path, stat)
+                    state["offset"] = state["size"] = stat.st_size
+                offset = state["offset"] - len(state["decoder"].getstate()[0])
+                start = max(0, offset - SNAPSHOT_LOG_TAIL_BYTES)
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    data = f.read(offset - start)
+            except FileNotFoundError:
+                continue
+            if start:
+                # Skip a UTF-8 sequence cut in half by the tail boundary.
+                data = data.lstrip(bytes(range(0x80, 0xC0)))
+            return data.decode("utf-8", errors="replace")
+        return ""
+
+    def _log_candidates(self, thread_id):
+        if thread_id is None:
+            yield ARTIFACTS_DIR / "ProcessLogs.md"
+            yield ARTIFACTS_DIR / "global" / "ProcessLogs.md"
+        else:
+            yield ARTIFACTS_DIR / thread_id / "ProcessLogs.md"
+            yield ARTIFACTS_DIR / f"ProcessLogs-{thread_id}.md"
+
+    def _results_candidates(self, thread_id):
+        if thread_id is None:
+            yield ARTIFACTS_DIR / "Results.csv"
+            yield ARTIFACTS_DIR / "global" / "Results.csv"
+        else:
+            yield ARTIFACTS_DIR / thread_id / "Results.csv"
+            yield ARTIFACTS_DIR / f"Results-{thread_id}.csv"
+
+    def _results_changed_shape(self, path: Path, state):
+        stat = path.stat()
+        if (stat.st_dev, stat.st_ino) != state["identity"] or stat.st_size < state["offset"]:
+            return True
+        with open(path, "rb") as f:
+            return (
+                _read_csv_header(f) != state["columns"]
+                or _results_fingerprint(f, state["offset"]) != state.get("fingerprint")
+            )
+
+    def _read_results(self, path: Path, thread_id):
+        """Parse rows appended since the last call; fall back to a snapshot when needed.
+
+        A snapshot is emitted for a new file, a changed header, a truncated file
+        or one rewritten in place (the bytes just before the stored offset no
+        longer match its fingerprint); otherwise only the newly completed rows
+        are sent as an append.
+        """
+        state = self.file_state.get(path)
+        stat = path.stat()
+        identity = (stat.st_dev, stat.st_ino)
+        with open(path, "rb") as f:
+            columns = _read_csv_header(f)
+            if columns is None:
+                # Truncated (or not yet written): start over once a header appears.
+                if state is not None:
+                    self.file_state.pop(path)
+                return None
+            header_end = f.tell()
+            if (
+                state is None
+                or state["identity"] != identity
+                or stat.st_size < state["offset"]
+                or columns != state["columns"]
+                or _results_fingerprint(f, state["offset"]) != state.get("fingerprint")
+            ):
+                f.seek(header_end)
+                rows, offset = _read_csv_records(f, columns)
+                state = self.file_state.put(path, {
+                    "kind": "results",
+                    "identity": identity,
+                    "columns": columns,
+                    "offset": offset,
+                    "size": offset,
+                    "fingerprint": _results_fingerprint(f, offset),
+                    "seq": state["seq"] + 1 if state else 1,
+                })
+                return self._results_event("snapshot", state, rows, thread_id)
+
+            f.seek(max(state["offset"], header_end))
+            rows, offset = _read_csv_records(f, columns)
+            if not rows:
+                return None
+            state["offset"] = state["size"] = offset
+            state["fingerprint"] = _results_fingerprint(f, offset)
+            state["seq"] += 1
+            return self._results_event("append", state, rows, thread_id)
+
+    @staticmethod
+    def _results_event(op, state, rows, thread_id):
+        return {
+            "type": "results",
+            "format": "table",
+            "op": op,
+            "table_seq": state["seq"],
+            "columns": state["columns"],
+            "rows": rows,
+            "thread_id": thread_id,
+        }
+
+
+def _utf8_decoder():
+    return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def _read_csv_header(f):
+    f.seek(0)
+    header_line = f.readline()
+    if not header_line.endswith(b"\n"):
+        return None
+    return next(csv.reader([header_line.decode("utf-8-sig", errors="replace")]), None)
+
+
+def _results_fingerprint(f, offset):
+    """Hash of the RESULTS_FINGERPRINT_BYTES before offset (the last rows already sent)."""
+    start = max(0, offset - RESULTS_FINGERPRINT_BYTES)
+    f.seek(start)
+    return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _read_csv_records(f, columns, limit=None):
+    """Read complete CSV records from the current position.
+
+    A record is complete once its trailing newline is written and its quotes are
+    balanced, so a row that is still being flushed is left for the next event.
+    Returns the parsed rows and the byte offset just past the last full record.
+    """
+    started = time.perf_counter()
+    offset = f.tell()
+    pending = []
+    pending_size = 0
+    quotes = 0
+    records = []
+    for line in f:
+        if limit is not None and offset + pending_size + len(line) > limit:
+            break
+        pending.append(line)
+        pending_size += len(line)
+        quotes += line.count(b'"')
+        if not line.endswith(b"\n") or quotes % 2:
+            continue
+        records.append(b"".join(pending).decode("utf-8", errors="replace"))
+        offset += pending_size
+        pending = []
+        pending_size = 0
+        quotes = 0
+
+    rows = [row for row in csv.reader(records) if row]
+    CSV_PARSE_SECONDS.observe(time.perf_counter() - started)
+    return rows, offset
+
+
+class WatchManager:
+    """Keeps kernel watches only on thread directories somebody is viewing.
+
+    A non-recursive watch on ARTIFACTS_DIR picks up top-level files and new
+    thread directories; output/artifacts/<thread>/ gets its own non-recursive
+    watch when the first client subscribes to the thread and loses it
+    UNWATCH_GRACE_SECONDS after the last one leaves, so a reconnecting tab does
+    not churn watches. The global/ directory is always watched. When a watch is
+    added, the thread's existing files are queued so anything written while it
+    was unwatched is picked up.
+    """
+
+    def __init__(self, observer, event_handler, grace=UNWATCH_GRACE_SECONDS):
+        self.observer = observer
+        self.event_handler = event_handler
+        self.grace = grace
+        self._refcounts = {}
+        self._watches = {}
+        self._release_timers = {}
+        self._lock = threading.RLock()
+        event_handler.watch_manager = self
+
+    def start(self):
+        self.observer.schedule(self.event_handler, path=str(ARTIFACTS_DIR), recursive=False)
+        self._refcounts["global"] = 1
+        self._add_watch("global")
+
+    def acquire(self, thread_id):
+        with self._lock:
+            timer = self._release_timers.pop(thread_id, None)
+            if timer is not None:
+                timer.cancel()
+            self._refcounts[thread_id] = self._refcounts.get(thread_id, 0) + 1
+            if self._refcounts[thread_id] == 1:
+                self._add_watch(thread_id)
+            self._catch_up(thread_id)
+
+    def release(self, thread_id):
+        with self._lock:
+            count = self._refcounts.get(thread_id, 0) - 1
+            if count > 0:
+                self._refcounts[thread_id] = count
+                return
+            self._refcounts.pop(thread_id, None)
+            if self.grace <= 0:
+                self._remove_watch(thread_id)
+                self.event_handler.hub.drop_replay(thread_id)
+                return
+            timer = threading.Timer(self.grace, self._expire, args=(thread_id,))
+            timer.daemon = True
+            self._release_timers[thread_id] = timer
+            timer.start()
+
+    def is_active(self, thread_id):
+        with self._lock:
+            thread_id = thread_id or "global"
+            return thread_id in self._refcounts or thread_id in self._release_timers
+
+    def watch_count(self):
+        with self._lock:
+            return len(self._watches) + 1
+
+    def directory_created(self, path: Path):
+        if path.parent != ARTIFACTS_DIR:
+            return
+        with self._lock:
+            if path.name in self._refcounts and path.name not in self._watches:
+                self._add_watch(path.name)
+                self._catch_up(path.name)
+
+    def _expire(self, thread_id):
+        with self._lock:
+            if self._release_timers.pop(thread_id, None) is None or thread_id in self._refcounts:
+                return
+            self._remove_watch(thread_id)
+        self.event_handler.hub.drop_replay(thread_id)
+
+    def _add_watch(self, thread_id):
+        directory = ARTIFACTS_DIR / thread_id
+        if thread_id in self._watches or not directory.is_dir():
+            return
         try:
-            with open(path, "r") as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-
-            self.message_queue.put({
-                "type": "results",
-                "format": "table",
-                "columns": reader.fieldnames,
-                "rows": rows,
-                "thread_id": thread_id
-            })
-        except FileNotFoundError:
+            self._watches[thread_id] = self.observer.schedule(
+                self.event_handler, path=str(directory), recursive=False
+            )
+        except OSError as exc:
+            print(f"Failed to watch {directory}: {exc}")
+
+    def _remove_watch(self, thread_id):
+        watch = self._watches.pop(thread_id, None)
+        if watch is None:
+            return
+        try:
+            self.observer.unschedule(watch)
+        except (KeyError, OSError):
             pass
 
+    def _catch_up(self, thread_id):
+        for path in self._thread_files(thread_id):
+            if path.exists():
+                self.event_handler.coalescer.submit(str(path))
+
+    def _thread_files(self, thread_id):
+        handler = self.event_handler
+        key = None if thread_id == "global" else thread_id
+        yield from handler._log_candidates(key)
+        yield from handler._results_candidates(key)
+
+
+class StatPoller(threading.Thread):
+    """Stat-based stand-in for the watchdog Observer, for NFS and other
+    filesystems where inotify events never arrive.
+
+    It implements the schedule/unschedule/start/stop/join subset WatchManager
+    uses and dispatches ordinary watchdog events to the handler, so
+    classification and tailing are shared with the native backend. A thread
+    directory is polled by stat()ing only its ProcessLogs.md and Results.csv;
+    the artifacts root is re-listed only when its own mtime changes. Every
+    thread directory has its own interval: it drops to POLL_MIN_SECONDS after
+    a change and doubles up to POLL_MAX_SECONDS while nothing moves, and a sweep
+    only visits directories that are due, so idle threads cost almost nothing.
+    With many watched directories the idle ceiling stretches so idle polling
+    stays under POLL_IDLE_BUDGET directories per second; busy directories are
+    unaffected.
+    """
+
+    THREAD_FILES = ("ProcessLogs.md", "Results.csv")
+
+    def __init__(self, min_interval=POLL_MIN_SECONDS, max_interval=POLL_MAX_SECONDS, idle_budget=POLL_IDLE_BUDGET):
+        super().__init__(name="agent-ws-poller", daemon=True)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_budget = idle_budget
+        self._targets = {}
+        self._heap = []
+        self._order = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self.counters = {"sweeps": 0, "dirs_polled": 0, "paths_statted": 0, "changes": 0, "sweep_cpu_seconds": 0.0}
+
+    def schedule(self, event_handler, path, recursive=False):
+        directory = Path(path).resolve()
+        target = {
+            "path": directory,
+            "handler": event_handler,
+            "is_root": directory == ARTIFACTS_DIR,
+            "interval": self.min_interval,
+            "files": {},
+            "dir_mtime": None,
+            "subdirs": None,
+        }
+        with self._condition:
+            self._targets[str(directory)] = target
+            self._push(target, time.monotonic())
+            self._condition.notify()
+        return str(directory)
 
-def start_observer(message_queue):
-    event_handler = MyHandler(message_queue)
-    observer = Observer()
-    observer.schedule(event_handler, path=str(ARTIFACTS_DIR), recursive=True)
+    def unschedule(self, watch):
+        with self._condition:
+            self._targets.pop(watch, None)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    remaining = self._heap[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopped:
+                    return
+                due = self._pop_due(time.monotonic())
+            self._sweep(due)
+
+    def _push(self, target, when):
+        self._order += 1
+        heapq.heappush(self._heap, (when, self._order, target))
+
+    def _pop_due(self, now):
+        # Take anything due within a quarter of the fast interval as well, so
+        # directories polled at similar times share one wakeup.
+        horizon = now + self.min_interval / 4
+        due = []
+        while self._heap and self._heap[0][0] <= horizon:
+            _, _, target = heapq.heappop(self._heap)
+            if self._targets.get(str(target["path"])) is target:
+                due.append(target)
+        return due
+
+    def _sweep(self, targets):
+        started = time.thread_time()
+        idle_interval = max(self.max_interval, len(self._targets) / self.idle_budget)
+        for target in targets:
+            try:
+                changed = self._poll(target)
+            except Exception as exc:
+                print(f"Failed to poll {target['path']}: {exc}")
+                changed = False
+            if changed or target["is_root"]:
+                # The root costs one stat() per poll and is how new thread
+                # directories are found, so it never backs off.
+                target["interval"] = self.min_interval
+            else:
+                target["interval"] = min(target["interval"] * 2, idle_interval)
+            with self._condition:
+                if self._targets.get(str(target["path"])) is target:
+                    self._push(target, time.monotonic() + target["interval"])
+        self.counters["sweeps"] += 1
+        self.counters["dirs_polled"] += len(targets)
+        self.counters["sweep_cpu_seconds"] += time.thread_time() - started
+
+    def _poll(self, target):
+        directory = target["path"]
+        handler = target["handler"]
+        if target["is_root"]:
+            self._rescan_root(target)
+            paths = [path for path in target["files"] if handler.wants(path)]
+        else:
+            paths = [directory / name for name in self.THREAD_FILES]
+
+        changed = False
+        for path in paths:
+            self.counters["paths_statted"] += 1
+            try:
+                stat = path.stat()
+            except (FileNotFoundError, NotADirectoryError):
+                target["files"][path] = None
+                continue
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if target["files"].get(path) != signature:
+                target["files"][path] = signature
+                changed = True
+                self.counters["changes"] += 1
+                handler.dispatch(FileModifiedEvent(str(path)))
+        return changed
+
+    def _rescan_root(self, target):
+        try:
+            dir_mtime = target["path"].stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if dir_mtime == target["dir_mtime"]:
+            return
+        target["dir_mtime"] = dir_mtime
+        subdirs = set()
+        files = {}
+        with os.scandir(target["path"]) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs.add(entry.name)
+                elif entry.name.startswith(("ProcessLogs", "Results")):
+                    path = Path(entry.path)
+                    files[path] = target["files"].get(path)
+        known = target["subdirs"]
+        target["subdirs"] = subdirs
+        target["files"] = files
+        if known is None:
+            return
+        for name in sorted(subdirs - known):
+            target["handler"].dispatch(DirCreatedEvent(str(target["path"] / name)))
+
+
+def start_observer(event_handler):
+    event_handler.coalescer.start()
+    if WATCH_BACKEND == "poll":
+        observer = StatPoller()
+    else:
+        observer = Observer()
+    watch_manager = WatchManager(observer, event_handler)
+    watch_manager.start()
+    observer.daemon = True
     observer.start()
+    return observer, watch_manager
+
+
+def _pack_ipc(kind, payload):
+    if isinstance(payload, dict):
+        payload = json.dumps(payload)
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return IPC_HEADER.pack(len(payload), kind) + payload
+
+
+async def _read_ipc(reader):
+    length, kind = IPC_HEADER.unpack(await reader.readexactly(IPC_HEADER.size))
+    return kind, await reader.readexactly(length)
+
+
+IPC_EVENT = ord("E")
+IPC_CONTROL = ord("M")
+
+
+class WorkerFanout:
+    """Watcher-process side of AGENT_WS_WORKERS mode.
+
+    Stands in for ArtifactHub under MyHandler: it assigns the global seq and
+    epoch, encodes each event once as columnar JSON and writes it to every
+    worker connected on IPC_PATH that has subscribers for the thread (global
+    events go to all workers). Workers report their subscribe/unsubscribe
+    transitions, which feed the WatchManager refcounts, and ask for snapshots
+    and stats over the same connection.
+    """
+
+    RPC_OPS = {"thread_snapshot", "results_snapshot", "stats", "metrics"}
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(8)
+        self._seq = 0
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._loop = None
+        self.watch_manager = None
+        self.counters = {"frames_published": 0, "worker_disconnects": 0}
+        self._collecting = {}
+        self._next_collect_id = 0
+
+    def bind_loop(self, loop):
+        self._loop = loop
+
+    def current_seq(self):
+        with self._lock:
+            return self._seq
+
+    def drop_replay(self, thread_id):
+        """Replay buffers live in the workers, which drop them themselves."""
+
+    def publish(self, event_data, mtime=None):
+        thread_id = event_data.get("thread_id")
+        key = None if thread_id is None else str(thread_id)
+        with self._publish_lock:
+            with self._lock:
+                self._seq += 1
+                event_data["seq"] = self._seq
+                self.counters["frames_published"] += 1
+                targets = [
+                    writer for writer, threads in self._workers.items() if key is None or key in threads
+                ]
+            if not targets or self._loop is None:
+                return
+            # Encoded outside _lock, which the event loop takes for worker messages.
+            payload = IPC_EVENT_MTIME.pack(mtime or 0.0) + _encode_event(event_data, "columnar").encode("utf-8")
+            message = _pack_ipc(IPC_EVENT, payload)
+            try:
+                # Scheduled under _publish_lock so workers receive frames in seq order.
+                self._loop.call_soon_threadsafe(self._send, targets, message)
+            except RuntimeError:
+                pass
+
+    def _send(self, writers, message):
+        for writer in writers:
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > IPC_MAX_BUFFER_BYTES:
+                print("Dropping a worker that stopped reading events")
+                writer.close()
+                continue
+            writer.write(message)
+
+    async def wait_disconnected(self, timeout):
+        deadline = time.monotonic() + timeout
+        while self._workers and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def handle_worker(self, reader, writer):
+        with self._lock:
+            self._workers[writer] = set()
+            hello = {"op": "hello", "epoch": self.epoch, "seq": self._seq}
+        writer.write(_pack_ipc(IPC_CONTROL, hello))
+        try:
+            while True:
+                _, payload = await _read_ipc(reader)
+                self._handle_worker_message(writer, json.loads(payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            with self._lock:
+                threads = self._workers.pop(writer, set())
+                self.counters["worker_disconnects"] += 1
+            for thread_id in threads:
+                self.watch_manager.release(thread_id)
+            writer.close()
+
+    def _handle_worker_message(self, writer, message):
+        op = message.get("op")
+        thread_id = message.get("thread_id")
+        if op in {"acquire", "release"}:
+            with self._lock:
+                threads = self._workers[writer]
+                changed = (thread_id not in threads) if op == "acquire" else (thread_id in threads)
+                if op == "acquire":
+                    threads.add(thread_id)
+                else:
+                    threads.discard(thread_id)
+            if changed:
+                getattr(self.watch_manager, op)(thread_id)
+        elif op in self.RPC_OPS:
+            asyncio.create_task(self._answer(writer, message["id"], op, thread_id))
+        elif op == "collected":
+            future = self._collecting.pop(message.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(message["families"])
 
+    async def collect_metrics(self, timeout=2.0):
+        """Metric families of this process plus every worker that answers in time."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for writer in list(self._workers):
+            self._next_collect_id += 1
+            future = self._collecting[self._next_collect_id] = loop.create_future()
+            futures.append(future)
+            writer.write(_pack_ipc(IPC_CONTROL, {"op": "collect", "id": self._next_collect_id}))
+        families = _local_metric_families()
+        if futures:
+            done, pending = await asyncio.wait(futures, timeout=timeout)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                families.extend(future.result())
+        return families
+
+    async def _answer(self, writer, request_id, op, thread_id):
+        try:
+            if op == "stats":
+                result = {**_watcher_stats(), "fanout": {**self.counters, "workers": len(self._workers)}}
+            elif op == "metrics":
+                result = await self.collect_metrics()
+            else:
+                result = await asyncio.to_thread(getattr(watcher, op), thread_id)
+            reply = {"op": "reply", "id": request_id, "result": result}
+        except Exception as exc:
+            reply = {"op": "reply", "id": request_id, "error": str(exc)}
+        if not writer.is_closing():
+            writer.write(_pack_ipc(IPC_CONTROL, reply))
+
+
+class UpstreamLink:
+    """Worker-process connection to the watcher process.
+
+    Feeds sequenced frames into the RelayHub, forwards its subscription
+    transitions upstream (it is the hub's watch_manager) and carries snapshot
+    and stats requests.
+    """
+
+    def __init__(self, relay_hub, path=IPC_PATH):
+        self.hub = relay_hub
+        self.path = path
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._next_id = 0
+
+    async def connect(self, attempts=50):
+        for attempt in range(attempts):
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(0.1)
+        _, payload = await _read_ipc(self._reader)
+        hello = json.loads(payload)
+        self.hub.epoch = hello["epoch"]
+        self.hub._seq = hello["seq"]
+
+    def acquire(self, thread_id):
+        self._send({"op": "acquire", "thread_id": thread_id})
+
+    def release(self, thread_id):
+        self._send({"op": "release", "thread_id": thread_id})
+
+    async def request(self, op, thread_id=None):
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self._send({"op": op, "id": self._next_id, "thread_id": thread_id})
+        return await future
+
+    def _send(self, message):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(_pack_ipc(IPC_CONTROL, message))
+
+    async def run(self):
+        """Read from the watcher until it goes away."""
+        try:
+            while True:
+                kind, payload = await _read_ipc(self._reader)
+                if kind == IPC_EVENT:
+                    (mtime,) = IPC_EVENT_MTIME.unpack_from(payload)
+                    text = payload[IPC_EVENT_MTIME.size:].decode("utf-8")
+                    self.hub.ingest(Frame(json.loads(text), encoded={"columnar": text}, mtime=mtime or None))
+                    continue
+                message = json.loads(payload)
+                if message.get("op") == "collect":
+                    self._send({"op": "collected", "id": message["id"], "families": _local_metric_families()})
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(RuntimeError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            print("Lost the connection to the watcher process")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("watcher process went away"))
+
+
+if PROCESS_ROLE == "worker":
+    hub = RelayHub()
+elif PROCESS_ROLE == "watcher":
+    hub = WorkerFanout()
+else:
+    hub = ArtifactHub()
+# Created by _start_watching() in the single/watcher process, so importing this
+# module does not open (or lock) the file state database.
+watcher = None
+
+
+def _parse_thread_ids(command):
+    raw_ids = command.get("thread_ids")
+    if raw_ids is None:
+        raw_ids = [command.get("thread_id")]
+    elif not isinstance(raw_ids, list):
+        raw_ids = [raw_ids]
+    thread_ids = {str(thread_id).strip() for thread_id in raw_ids if thread_id is not None}
+    return {thread_id for thread_id in thread_ids if THREAD_ID_PATTERN.fullmatch(thread_id)}
+
+
+def _parse_resume(command, thread_ids):
+    last_seq = command.get("last_seq")
+    if isinstance(last_seq, dict):
+        items = last_seq.items()
+    elif len(thread_ids) == 1:
+        items = [(next(iter(thread_ids)), last_seq)]
+    else:
+        items = []
+    resume = {}
+    for thread_id, value in items:
+        try:
+            resume[str(thread_id)] = int(value)
+        except (TypeError, ValueError):
+            continue
+    return resume
+
+
+async def _from_watcher(op, thread_id=None):
+    """Run a MyHandler snapshot method here, or in the watcher process from a worker."""
+    if PROCESS_ROLE == "worker":
+        return await hub.upstream.request(op, thread_id)
+    return await asyncio.to_thread(getattr(watcher, op), thread_id)
+
+
+def _watcher_stats():
+    watch_manager = watcher.watch_manager
+    return {
+        "watcher": {
+            **watcher.counters,
+            "file_state_entries": len(watcher.file_state),
+            "watches": watch_manager.watch_count() if watch_manager else 0,
+        },
+        "poller": getattr(watch_manager.observer, "counters", None) if watch_manager else None,
+    }
+
+
+def _local_metric_families():
+    """Metrics of this process: client-side in single/worker mode, watcher-side in single/watcher mode."""
+    families = []
+    if isinstance(hub, ArtifactHub):
+        stats = hub.stats()
+        depths = hub.queue_depths()
+        families += [
+            _metric_family("agent_ws_clients", "gauge", "Connected WebSocket clients.", [("", {}, stats["clients"])]),
+            _metric_family(
+                "agent_ws_thread_subscribers",
+                "gauge",
+                "Clients subscribed to each thread.",
+                [("", {"thread_id": thread_id}, count) for thread_id, count in sorted(hub.subscriber_counts().items())],
+            ),
+            _metric_family(
+                "agent_ws_client_queue_depth_max", "gauge", "Deepest client outbox, in frames.", [("", {}, max(depths, default=0))]
+            ),
+            _metric_family(
+                "agent_ws_client_queue_frames", "gauge", "Frames queued across all client outboxes.", [("", {}, sum(depths))]
+            ),
+            _metric_family(
+                "agent_ws_clients_by_queue_depth",
+                "gauge",
+                "Clients whose outbox holds at most le frames.",
+                [
+                    ("", {"le": str(bound)}, sum(1 for depth in depths if depth <= bound))
+                    for bound in (0, 8, 32, 128, CLIENT_QUEUE_MAX)
+                ] + [("", {"le": "+Inf"}, len(depths))],
+            ),
+            _metric_family(
+                "agent_ws_frames_dropped_total", "counter", "Frames dropped from slow clients' outboxes.",
+                [("", {}, stats["frames_dropped"])],
+            ),
+            _metric_family(
+                "agent_ws_slow_client_disconnects_total", "counter", "Clients closed for staying behind.",
+                [("", {}, stats["slow_disconnects"])],
+            ),
+            DELIVERY_LATENCY_SECONDS.family(),
+        ]
+    if watcher is not None:
+        watch_manager = watcher.watch_manager
+        families += [
+            _metric_family(
+                "agent_ws_watch_events_total",
+                "counter",
+                "Filesystem events received from the watch backend.",
+                [("", {"kind": kind, "type": event_type}, count) for (kind, event_type), count in sorted(watcher.event_types.items())],
+            ),
+            _metric_family(
+                "agent_ws_log_bytes_read_total", "counter", "Bytes tailed from ProcessLogs files.",
+                [("", {}, watcher.counters["log_bytes_read"])],
+            ),
+            _metric_family(
+                "agent_ws_frames_emitted_total", "counter", "Frames published by the watcher.",
+                [("", {}, watcher.counters["frames_emitted"])],
+            ),
+            _metric_family(
+                "agent_ws_watched_directories", "gauge", "Directories currently watched.",
+                [("", {}, watch_manager.watch_count() if watch_manager else 0)],
+            ),
+            CSV_PARSE_SECONDS.family(),
+        ]
+    if WORKER_INDEX is not None:
+        for family in families:
+            family["samples"] = [(suffix, {**labels, "worker": WORKER_INDEX}, value) for suffix, labels, value in family["samples"]]
+    return families
+
+
+async def _metric_families():
+    if PROCESS_ROLE == "single":
+        return _local_metric_families()
+    if PROCESS_ROLE == "worker":
+        return await hub.upstream.request("metrics")
+    return await hub.collect_metrics()
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_metrics(families):
+    """Prometheus text exposition format; families from several processes are merged by name."""
+    merged = {}
+    for family in families:
+        existing = merged.get(family["name"])
+        if existing is None:
+            merged[family["name"]] = {**family, "samples": list(family["samples"])}
+        else:
+            existing["samples"].extend(family["samples"])
+    lines = []
+    for name, family in merged.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for suffix, labels, value in family["samples"]:
+            label_text = ",".join(f'{key}="{_label_value(label)}"' for key, label in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def _process_request(connection, request):
+    """Answer GET /metrics on the WebSocket port; everything else is a WebSocket handshake."""
+    if not METRICS_ENABLED or urlsplit(request.path).path != "/metrics":
+        return None
     try:
-        while True:
-            time.sleep(0.3)
-    except KeyboardInterrupt:
-        observer.stop()
+        body = render_metrics(await _metric_families())
+    except Exception as exc:
+        return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, f"metrics unavailable: {exc}\n")
+    response = connection.respond(HTTPStatus.OK, body)
+    del response.headers["Content-Type"]
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    return response
 
-    observer.join()
+
+async def _send_snapshot(message_queue, thread_id):
+    try:
+        snapshot = await _from_watcher("thread_snapshot", thread_id)
+    except Exception:
+        message_queue.release(thread_id, 0)
+        raise
+    message_queue.put(Frame(snapshot))
+    message_queue.release(thread_id, snapshot["seq"])
+
+
+async def _handle_command(message_queue, raw_message):
+    try:
+        command = json.loads(raw_message)
+    except (TypeError, ValueError):
+        return
+    if not isinstance(command, dict):
+        return
+
+    command_type = command.get("type")
+    if command_type == "subscribe":
+        thread_ids = _parse_thread_ids(command)
+        current, replay, needs_snapshot = hub.subscribe(
+            message_queue,
+            thread_ids,
+            replace=bool(command.get("replace")),
+            resume=_parse_resume(command, thread_ids),
+            epoch=command.get("epoch"),
+        )
+        message_queue.put(Frame({"type": "subscriptions", "thread_ids": sorted(current)}))
+        for frame in replay:
+            message_queue.put(frame)
+        for thread_id in needs_snapshot:
+            await _send_snapshot(message_queue, thread_id)
+    elif command_type == "unsubscribe":
+        thread_ids = _parse_thread_ids(command)
+        current = hub.unsubscribe(message_queue, thread_ids or None)
+        message_queue.put(Frame({"type": "subscriptions", "thread_ids": sorted(current)}))
+    elif command_type == "resync":
+        thread_id = next(iter(_parse_thread_ids(command)), None)
+        if not hub.is_subscribed(message_queue, thread_id):
+            return
+        snapshot = await _from_watcher("results_snapshot", thread_id)
+        if snapshot is not None:
+            message_queue.put(Frame(snapshot))
+    elif command_type == "stats":
+        watcher_stats = await _from_watcher("stats") if PROCESS_ROLE == "worker" else _watcher_stats()
+        message_queue.put(Frame({
+            "type": "stats",
+            **hub.stats(),
+            "queue_depth": len(message_queue),
+            "pid": os.getpid(),
+            **watcher_stats,
+        }))
+
+
+async def _receive_commands(websocket, message_queue):
+    async for raw_message in websocket:
+        await _handle_command(message_queue, raw_message)
+
+
+async def _send_events(websocket, message_queue):
+    while True:
+        frame = await message_queue.get()
+        if frame is None:
+            await websocket.close(code=1013, reason=message_queue.close_reason)
+            return
+        await websocket.send(frame.encode(message_queue.encoding))
+        if frame.mtime is not None:
+            DELIVERY_LATENCY_SECONDS.observe(max(0.0, time.time() - frame.mtime))
+            frame.mtime = None
+
+
+def _requested_encoding(websocket):
+    request = getattr(websocket, "request", None)
+    path = request.path if request is not None else getattr(websocket, "path", "")
+    requested = (parse_qs(urlsplit(path or "").query).get("format") or ["json"])[0].lower()
+    if requested not in WIRE_ENCODINGS:
+        return "json"
+    if requested == "msgpack" and msgpack is None:
+        return "columnar"
+    return requested
+
+
+def _deflate_extensions():
+    if not DEFLATE_ENABLED:
+        return []
+    return [
+        ServerPerMessageDeflateFactory(
+            server_max_window_bits=DEFLATE_WINDOW_BITS,
+            client_max_window_bits=DEFLATE_WINDOW_BITS,
+            compress_settings={"level": DEFLATE_LEVEL, "memLevel": DEFLATE_MEM_LEVEL},
+        )
+    ]
 
 
 async def handle_connection(websocket):
     print("Client connected")
-    message_queue = queue.Queue()
-
-    observer_thread = threading.Thread(
-        target=start_observer,
-        args=(message_queue,),
-        daemon=True
-    )
-    observer_thread.start()
+    encoding = _requested_encoding(websocket)
+    message_queue = hub.register(encoding)
+    message_queue.put(Frame({
+        "type": "hello",
+        "epoch": hub.epoch,
+        "seq": hub.current_seq(),
+        "encoding": encoding,
+    }))
+    tasks = [
+        asyncio.create_task(_receive_commands(websocket, message_queue)),
+        asyncio.create_task(_send_events(websocket, message_queue)),
+    ]
 
     try:
-        while True:
-            try:
-                event_data = message_queue.get_nowait()
-                await websocket.send(json.dumps(event_data))
-            except queue.Empty:
-                await asyncio.sleep(0.2)
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unregister(message_queue)
         print("Client disconnected")
 
 
+def _serve(**kwargs):
+    return websockets.serve(
+        handle_connection,
+        SERVER_HOST,
+        SERVER_PORT,
+        compression=None,
+        extensions=_deflate_extensions(),
+        process_request=_process_request,
+        **kwargs,
+    )
+
+
+def _stop_future(loop):
+    stop = loop.create_future()
+    # Shut down cleanly on SIGTERM so tailing offsets are flushed to disk.
+    loop.add_signal_handler(signal.SIGTERM, lambda: stop.done() or stop.set_result(None))
+    return stop
+
+
+def _start_watching():
+    global watcher
+    watcher = MyHandler(hub)
+    observer, hub.watch_manager = start_observer(watcher)
+    return observer
+
+
+def _stop_watching(observer):
+    observer.stop()
+    observer.join()
+    watcher.coalescer.stop()
+    watcher.file_state.flush()
+
+
+def _spawn_worker(index):
+    env = {**os.environ, "AGENT_WS_ROLE": "worker", "AGENT_WS_WORKER_INDEX": str(index), "AGENT_WS_IPC_PATH": IPC_PATH}
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env)
+
+
+def _reap_workers(workers, timeout=5):
+    for process in workers:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_watcher():
+    """Watch and parse once, and fan events out to WORKER_COUNT worker processes."""
+    loop = asyncio.get_running_loop()
+    hub.bind_loop(loop)
+    stop = _stop_future(loop)
+    observer = _start_watching()
+    if os.path.exists(IPC_PATH):
+        os.unlink(IPC_PATH)
+    server = await asyncio.start_unix_server(hub.handle_worker, path=IPC_PATH)
+    workers = [_spawn_worker(index) for index in range(WORKER_COUNT)]
+    print(f"WebSocket server running on ws://{SERVER_HOST}:{SERVER_PORT} with {WORKER_COUNT} workers")
+    try:
+        while not stop.done():
+            await asyncio.wait([stop], timeout=1)
+            for index, process in enumerate(workers):
+                if process.poll() is not None and not stop.done():
+                    print(f"Worker {index} exited with {process.returncode}; restarting")
+                    workers[index] = _spawn_worker(index)
+    finally:
+        for process in workers:
+            if process.poll() is None:
+                process.terminate()
+        await asyncio.to_thread(_reap_workers, workers)
+        server.close()
+        await hub.wait_disconnected(timeout=2)
+        if os.path.exists(IPC_PATH):
+            os.unlink(IPC_PATH)
+        _stop_watching(observer)
+
+
+async def run_worker():
+    """Serve WebSocket clients on the shared port with frames relayed from the watcher."""
+    loop = asyncio.get_running_loop()
+    hub.bind_loop(loop)
+    stop = _stop_future(loop)
+    hub.upstream = hub.watch_manager = UpstreamLink(hub)
+    await hub.upstream.connect()
+    reader = asyncio.create_task(hub.upstream.run())
+    async with _serve(reuse_port=True):
+        await asyncio.wait([stop, reader], return_when=asyncio.FIRST_COMPLETED)
+    reader.cancel()
+
+
 async def main():
-    print("WebSocket server running on ws://0.0.0.0:8090")
-    async with websockets.serve(handle_connection, "0.0.0.0", 8090):
-        await asyncio.Future()
+    if PROCESS_ROLE == "watcher":
+        return await run_watcher()
+    if PROCESS_ROLE == "worker":
+        return await run_worker()
+    loop = asyncio.get_running_loop()
+    hub.bind_loop(loop)
+    stop = _stop_future(loop)
+    observer = _start_watching()
+    print(f"WebSocket server running on ws://{SERVER_HOST}:{SERVER_PORT}")
+    try:
+        async with _serve():
+            await stop
+    finally:
+        _stop_watching(observer)
 
 
 if __name__ == "__main__":
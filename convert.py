@@ -1,20 +1,73 @@
+import hashlib
+import html
 import os
 import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
 
-def convert_to_html(content, output_base="pathway", output_dir=None):
-    write_artifacts = os.getenv("WRITE_UI_ARTIFACTS", os.getenv("WRITE_ARTIFACTS", "false")).lower() in {
-        "1",
-        "true",
-        "yes",
-    }
-    if not write_artifacts:
-        return ""
-    output_root = output_base
-    if output_dir:
-        output_root = os.path.join(output_dir, output_base)
+from markdown_it import MarkdownIt
+
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "64"))
+
+# CommonMark plus the GitHub extensions reports use. Raw HTML in the report is
+# escaped rather than passed through, as GitHub's renderer would sanitize it.
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+_rendered = OrderedDict()
+_rendered_lock = threading.Lock()
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ margin: 0; background: #fff; color: #1f2328; font: 16px/1.5 -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; }}
+.markdown-body {{ box-sizing: border-box; max-width: 980px; margin: 0 auto; padding: 45px; }}
+.markdown-body h1, .markdown-body h2 {{ padding-bottom: .3em; border-bottom: 1px solid #d1d9e0; }}
+.markdown-body h1, .markdown-body h2, .markdown-body h3, .markdown-body h4 {{ margin: 24px 0 16px; font-weight: 600; line-height: 1.25; }}
+.markdown-body p, .markdown-body ul, .markdown-body ol, .markdown-body table, .markdown-body pre, .markdown-body blockquote {{ margin: 0 0 16px; }}
+.markdown-body a {{ color: #0969da; text-decoration: none; }}
+.markdown-body code {{ padding: .2em .4em; font-size: 85%; background: #eff1f3; border-radius: 6px; font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; }}
+.markdown-body pre {{ padding: 16px; overflow: auto; font-size: 85%; line-height: 1.45; background: #f6f8fa; border-radius: 6px; }}
+.markdown-body pre code {{ padding: 0; background: transparent; font-size: 100%; }}
+.markdown-body blockquote {{ padding: 0 1em; color: #59636e; border-left: .25em solid #d1d9e0; }}
+.markdown-body table {{ display: block; width: max-content; max-width: 100%; overflow: auto; border-collapse: collapse; }}
+.markdown-body th, .markdown-body td {{ padding: 6px 13px; border: 1px solid #d1d9e0; }}
+.markdown-body th {{ font-weight: 600; }}
+.markdown-body tr:nth-child(2n) {{ background: #f6f8fa; }}
+.markdown-body img {{ max-width: 100%; }}
+.markdown-body hr {{ height: .25em; margin: 24px 0; background: #d1d9e0; border: 0; }}
+</style>
+</head>
+<body>
+<article class="markdown-body">
+{body}
+</article>
+</body>
+</html>
+"""
 
+
+def render_markdown(content):
+    """HTML body for markdown content, rendered once per distinct content (by SHA-256)."""
+    key = hashlib.sha256(content.encode("utf-8")).digest()
+    with _rendered_lock:
+        body = _rendered.get(key)
+        if body is not None:
+            _rendered.move_to_end(key)
+            return body
+    body = _markdown.render(content)
+    with _rendered_lock:
+        _rendered[key] = body
+        while len(_rendered) > REPORT_CACHE_MAX_ENTRIES:
+            _rendered.popitem(last=False)
+    return body
+
+
+def _convert_with_grip(content, output_root, html_path):
     md_path = f"{output_root}_report.md"
-    html_path = f"{output_root}.html"
 
     # Save content to a markdown file
     with open(md_path, 'w') as file:
@@ -35,4 +88,36 @@ def convert_to_html(content, output_base="pathway", output_dir=None):
     except FileNotFoundError:
         print("The 'grip' command was not found. Ensure it is installed and available in your PATH.")
 
+
+def convert_to_html(content, output_base="pathway", output_dir=None):
+    write_artifacts = os.getenv("WRITE_UI_ARTIFACTS", os.getenv("WRITE_ARTIFACTS", "false")).lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    if not write_artifacts:
+        return ""
+    output_root = output_base
+    if output_dir:
+        output_root = os.path.join(output_dir, output_base)
+
+    html_path = f"{output_root}.html"
+
+    # REPORT_RENDERER=grip keeps the old subprocess path (needs the GitHub API).
+    if os.getenv("REPORT_RENDERER", "markdown-it").lower() == "grip":
+        _convert_with_grip(content, output_root, html_path)
+        return html_path
+
+    page = PAGE_TEMPLATE.format(title=html.escape(output_base), body=render_markdown(content))
+    # Each writer gets its own temp file so concurrent calls for the same
+    # output_base cannot replace each other's file out from under them.
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=os.path.dirname(html_path) or ".", suffix=".tmp", delete=False
+    ) as file:
+        file.write(page)
+    try:
+        os.replace(file.name, html_path)
+    except OSError:
+        os.unlink(file.name)
+        raise
     return html_path
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the agent-ws server (change.py).
+
+Simulates the pipeline by appending to ProcessLogs.md and growing Results.csv
+in N thread directories at fixed rates, while M WebSocket clients subscribe
+and measure what arrives. Every log line and results row carries its write
+time, so the report includes delivery latency, throughput, lost lines,
+results table_seq gaps and the server's RSS. By default the server is started
+on a free port against a scratch artifacts directory:
+
+    python scripts/agent_ws_loadtest.py --threads 50 --clients 200 --duration 30 \\
+        --workers 4 --output loadtest.json
+
+Use --url/--artifacts-dir/--server-pid to test a server that is already running.
+The report is JSON so runs can be diffed across changes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import websockets
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LOG_MARKER = "lt:"
+RESULTS_COLUMNS = ["thread", "n", "ts", "payload"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values_ms):
+    if not values_ms:
+        return {"count": 0}
+    return {
+        "count": len(values_ms),
+        "p50_ms": round(percentile(values_ms, 50), 2),
+        "p90_ms": round(percentile(values_ms, 90), 2),
+        "p99_ms": round(percentile(values_ms, 99), 2),
+        "max_ms": round(max(values_ms), 2),
+        "mean_ms": round(statistics.fmean(values_ms), 2),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_tree_rss(pid):
+    """Resident set size in bytes of pid and its direct children (worker mode)."""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as handle:
+            pids += [int(child) for child in handle.read().split()]
+    except OSError:
+        pass
+    total = 0
+    for member in pids:
+        try:
+            with open(f"/proc/{member}/status") as handle:
+                for line in handle:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class Writer:
+    """Appends timestamped log lines and results rows to one thread directory."""
+
+    def __init__(self, directory, thread_id, payload_bytes):
+        self.thread_id = thread_id
+        self.log_path = directory / "ProcessLogs.md"
+        self.results_path = directory / "Results.csv"
+        self.payload = "x" * payload_bytes
+        self.lines_written = 0
+        self.rows_written = 0
+        directory.mkdir(parents=True, exist_ok=True)
+        self.log_path.write_text("")
+        self.results_path.write_text(",".join(RESULTS_COLUMNS) + "\n")
+
+    def write_log(self):
+        self.lines_written += 1
+        with open(self.log_path, "a") as handle:
+            handle.write(f"{LOG_MARKER}{self.thread_id}:{self.lines_written}:{time.time_ns()} {self.payload}\n")
+
+    def write_row(self):
+        self.rows_written += 1
+        with open(self.results_path, "a") as handle:
+            handle.write(f"{self.thread_id},{self.rows_written},{time.time_ns()},{self.payload}\n")
+
+
+async def run_writer(writer, log_rate, results_rate, stop):
+    log_interval = 1 / log_rate if log_rate > 0 else None
+    results_interval = 1 / results_rate if results_rate > 0 else None
+    # Spread writers so the threads do not all flush on the same tick.
+    await asyncio.sleep(random.random() * min(filter(None, [log_interval, results_interval, 1.0])))
+    next_log = next_row = time.monotonic()
+    while not stop.is_set():
+        now = time.monotonic()
+        if log_interval is not None and now >= next_log:
+            writer.write_log()
+            next_log += log_interval
+        if results_interval is not None and now >= next_row:
+            writer.write_row()
+            next_row += results_interval
+        upcoming = [due for due in (log_interval and next_log, results_interval and next_row) if due]
+        await asyncio.sleep(max(0.0, min(upcoming) - time.monotonic()))
+
+
+class Client:
+    """One simulated browser tab subscribed to a few threads."""
+
+    def __init__(self, url, thread_ids, encoding):
+        self.url = f"{url}/?format={encoding}" if encoding != "json" else url
+        self.thread_ids = thread_ids
+        self.encoding = encoding
+        self.log_latencies_ms = []
+        self.results_latencies_ms = []
+        self.lines_seen = {thread_id: set() for thread_id in thread_ids}
+        self.rows_seen = {thread_id: 0 for thread_id in thread_ids}
+        self.table_seq = {}
+        self.table_seq_gaps = 0
+        self.snapshots = 0
+        self.frames = 0
+        self.bytes = 0
+        self.closed_code = None
+        self.subscribed = asyncio.Event()
+        self._partial = {}
+
+    def decode(self, raw):
+        if isinstance(raw, bytes):
+            return msgpack.unpackb(raw, raw=False)
+        return json.loads(raw)
+
+    async def run(self, stop):
+        try:
+            async with websockets.connect(self.url, max_size=None) as websocket:
+                await websocket.send(json.dumps({"type": "subscribe", "thread_ids": self.thread_ids}))
+                while not stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    received_ns = time.time_ns()
+                    self.frames += 1
+                    self.bytes += len(raw)
+                    self.handle(self.decode(raw), received_ns)
+        except websockets.exceptions.ConnectionClosed as exc:
+            self.closed_code = exc.rcvd.code if exc.rcvd else None
+        finally:
+            self.subscribed.set()
+
+    def handle(self, message, received_ns):
+        message_type = message.get("type")
+        if message_type == "subscriptions":
+            self.subscribed.set()
+        elif message_type == "snapshot":
+            self.snapshots += 1
+            results = message.get("results")
+            if results:
+                self.table_seq[message["thread_id"]] = results.get("table_seq")
+        elif message_type == "logs" and message.get("thread_id") in self.lines_seen:
+            self.handle_logs(message["thread_id"], message.get("response", ""), received_ns)
+        elif message_type == "results" and message.get("thread_id") in self.rows_seen:
+            self.handle_results(message, received_ns)
+
+    def handle_logs(self, thread_id, text, received_ns):
+        text = self._partial.pop(thread_id, "") + text
+        lines = text.split("\n")
+        if lines[-1]:
+            self._partial[thread_id] = lines[-1]
+        for line in lines[:-1]:
+            if not line.startswith(LOG_MARKER):
+                continue
+            _, number, written_ns = line[len(LOG_MARKER):].split(" ", 1)[0].rsplit(":", 2)
+            self.lines_seen[thread_id].add(int(number))
+            self.log_latencies_ms.append((received_ns - int(written_ns)) / 1e6)
+
+    def handle_results(self, message, received_ns):
+        thread_id = message["thread_id"]
+        previous = self.table_seq.get(thread_id)
+        table_seq = message.get("table_seq")
+        if message.get("op") == "append" and previous is not None and table_seq != previous + 1:
+            self.table_seq_gaps += 1
+        self.table_seq[thread_id] = table_seq
+        columns = message.get("columns") or RESULTS_COLUMNS
+        ts_index = columns.index("ts")
+        for row in message.get("rows", ()):
+            values = row if isinstance(row, list) else [row.get(column) for column in columns]
+            self.rows_seen[thread_id] += 1
+            if message.get("op") == "append":
+                self.results_latencies_ms.append((received_ns - int(values[ts_index])) / 1e6)
+
+
+def start_server(args, artifacts_dir, port):
+    env = {
+        **os.environ,
+        "PIPELINE_ARTIFACTS_DIR": str(artifacts_dir),
+        "AGENT_WS_PORT": str(port),
+        "AGENT_WS_HOST": "127.0.0.1",
+        "AGENT_WS_STATE_DB_PATH": str(artifacts_dir.parent / "agent_ws_state.db"),
+        "AGENT_WS_WORKERS": str(args.workers),
+        "AGENT_WS_IPC_PATH": str(artifacts_dir.parent / "agent-ws.sock"),
+    }
+    log = open(artifacts_dir.parent / "server.log", "w")
+    return subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "change.py")], env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_for_server(url, timeout=15):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with websockets.connect(url):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def run(args):
+    scratch = None
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+        artifacts_dir = Path(args.artifacts_dir)
+        server_pid = args.server_pid
+    else:
+        scratch = tempfile.TemporaryDirectory(prefix="agent-ws-loadtest-")
+        artifacts_dir = Path(scratch.name) / "artifacts"
+        artifacts_dir.mkdir()
+        port = free_port()
+        url = f"ws://127.0.0.1:{port}"
+        server = start_server(args, artifacts_dir, port)
+        server_pid = server.pid
+
+    try:
+        thread_ids = [f"{args.thread_prefix}{index}" for index in range(args.threads)]
+        writers = {
+            thread_id: Writer(artifacts_dir / thread_id, thread_id, args.payload_bytes) for thread_id in thread_ids
+        }
+        await wait_for_server(url)
+
+        rng = random.Random(args.seed)
+        clients = [
+            Client(url, rng.sample(thread_ids, min(args.threads_per_client, len(thread_ids))), args.encoding)
+            for _ in range(args.clients)
+        ]
+        stop_clients = asyncio.Event()
+        client_tasks = [asyncio.create_task(client.run(stop_clients)) for client in clients]
+        await asyncio.wait_for(asyncio.gather(*(client.subscribed.wait() for client in clients)), timeout=30)
+        # Lines written before a client subscribed are not expected by it.
+        await asyncio.sleep(args.warmup)
+        baseline = {thread_id: (writer.lines_written, writer.rows_written) for thread_id, writer in writers.items()}
+
+        rss_samples = []
+        stop_writers = asyncio.Event()
+        writer_tasks = [
+            asyncio.create_task(run_writer(writer, args.log_rate, args.results_rate, stop_writers))
+            for writer in writers.values()
+        ]
+        started = time.monotonic()
+        while time.monotonic() - started < args.duration:
+            if server_pid:
+                rss_samples.append(process_tree_rss(server_pid))
+            await asyncio.sleep(min(1.0, args.duration))
+        stop_writers.set()
+        await asyncio.gather(*writer_tasks)
+        elapsed = time.monotonic() - started
+        await asyncio.sleep(args.drain)
+        stop_clients.set()
+        await asyncio.gather(*client_tasks)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if scratch is not None:
+            scratch.cleanup()
+
+    expected_lines = missing_lines = expected_rows = missing_rows = 0
+    for client in clients:
+        for thread_id in client.thread_ids:
+            lines_before, rows_before = baseline[thread_id]
+            wanted = set(range(lines_before + 1, writers[thread_id].lines_written + 1))
+            expected_lines += len(wanted)
+            missing_lines += len(wanted - client.lines_seen[thread_id])
+            rows = writers[thread_id].rows_written - rows_before
+            expected_rows += rows
+            missing_rows += max(0, rows - client.rows_seen[thread_id])
+
+    frames = sum(client.frames for client in clients)
+    received_bytes = sum(client.bytes for client in clients)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_seconds": round(elapsed, 2),
+        "written": {
+            "log_lines": sum(writer.lines_written for writer in writers.values()),
+            "result_rows": sum(writer.rows_written for writer in writers.values()),
+        },
+        "latency": {
+            "logs": summarize([value for client in clients for value in client.log_latencies_ms]),
+            "results": summarize([value for client in clients for value in client.results_latencies_ms]),
+        },
+        "throughput": {
+            "frames_per_second": round(frames / elapsed, 1),
+            "bytes_per_second": round(received_bytes / elapsed, 1),
+            "frames_per_client_per_second": round(frames / elapsed / max(1, len(clients)), 2),
+        },
+        "drops": {
+            "expected_log_lines": expected_lines,
+            "missing_log_lines": missing_lines,
+            "expected_result_rows": expected_rows,
+            "missing_result_rows": missing_rows,
+            "table_seq_gaps": sum(client.table_seq_gaps for client in clients),
+            "snapshots": sum(client.snapshots for client in clients),
+            "clients_closed": sum(1 for client in clients if client.closed_code is not None),
+        },
+        "server": {
+            "rss_max_mb": round(max(rss_samples) / 2**20, 1) if rss_samples else None,
+            "rss_end_mb": round(rss_samples[-1] / 2**20, 1) if rss_samples else None,
+        },
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=20, help="thread directories written by the simulated pipeline")
+    parser.add_argument("--clients", type=int, default=50, help="simulated WebSocket clients")
+    parser.add_argument("--threads-per-client", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of writes")
+    parser.add_argument("--log-rate", type=float, default=20.0, help="log lines per second per thread")
+    parser.add_argument("--results-rate", type=float, default=2.0, help="results rows per second per thread")
+    parser.add_argument("--payload-bytes", type=int, default=80)
+    parser.add_argument("--encoding", choices=["json", "columnar", "msgpack"], default="json")
+    parser.add_argument("--workers", type=int, default=1, help="AGENT_WS_WORKERS for the spawned server")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--drain", type=float, default=3.0, help="seconds to wait for in-flight frames")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--thread-prefix", default="lt")
+    parser.add_argument("--url", help="test a running server instead of spawning one")
+    parser.add_argument("--artifacts-dir", help="artifacts directory of the running server (with --url)")
+    parser.add_argument("--server-pid", type=int, help="pid of the running server, for RSS (with --url)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.url and not args.artifacts_dir:
+        parser.error("--url needs --artifacts-dir")
+    if args.encoding == "msgpack" and msgpack is None:
+        parser.error("--encoding msgpack needs the msgpack package")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Measure file-write → WebSocket-frame latency for the agent-ws server (change.py).
+
+Start the server against a scratch artifacts directory first, e.g.
+
+    PIPELINE_ARTIFACTS_DIR=/tmp/agent-ws-bench python change.py
+
+then run
+
+    python scripts/bench_agent_ws_latency.py --artifacts-dir /tmp/agent-ws-bench
+
+Each sample appends a marker line to <artifacts>/<thread>/ProcessLogs.md and
+records how long it takes for the marker to arrive on the socket.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+import websockets
+
+MARKER = "bench-marker:"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_markers(text):
+    for line in text.splitlines():
+        if line.startswith(MARKER):
+            yield int(line[len(MARKER):])
+
+
+async def run(args):
+    log_path = Path(args.artifacts_dir) / args.thread_id / "ProcessLogs.md"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    log_path.touch()
+
+    sent = {}
+    latencies_ms = []
+
+    async with websockets.connect(args.url, max_size=None) as websocket:
+        await websocket.send(json.dumps({"type": "subscribe", "thread_id": args.thread_id}))
+        await asyncio.sleep(args.warmup)
+
+        async def reader():
+            async for raw in websocket:
+                received_ns = time.perf_counter_ns()
+                data = json.loads(raw)
+                if data.get("type") != "logs":
+                    continue
+                for sample_id in parse_markers(data.get("response", "")):
+                    started_ns = sent.pop(sample_id, None)
+                    if started_ns is not None:
+                        latencies_ms.append((received_ns - started_ns) / 1e6)
+
+        reader_task = asyncio.create_task(reader())
+        for sample_id in range(args.samples):
+            sent[sample_id] = time.perf_counter_ns()
+            with open(log_path, "a") as handle:
+                handle.write(f"{MARKER}{sample_id}\n")
+            await asyncio.sleep(args.interval)
+
+        deadline = time.monotonic() + args.timeout
+        while sent and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        reader_task.cancel()
+
+    report = {
+        "samples": args.samples,
+        "received": len(latencies_ms),
+        "lost": len(sent),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": statistics.fmean(latencies_ms) if latencies_ms else None,
+        "max_ms": max(latencies_ms) if latencies_ms else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8090")
+    parser.add_argument("--artifacts-dir", required=True)
+    parser.add_argument("--thread-id", default="bench")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between writes")
+    parser.add_argument("--warmup", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for stragglers")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Measure the CPU cost of the stat-polling watch backend (AGENT_WS_WATCH_BACKEND=poll).
+
+Creates N thread directories under a scratch artifacts root, keeps --active of
+them busy with appends, and runs change.StatPoller over all of them for
+--seconds. Reports poller CPU per second and per sweep for each N, which should
+grow far slower than N because idle directories back off to the slow interval:
+
+    python scripts/bench_poll_sweep.py --threads 100 1000 5000 --active 10
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(tempfile.mkdtemp(prefix="agent-ws-poll-bench-"))
+os.environ["PIPELINE_ARTIFACTS_DIR"] = str(ROOT)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import change  # noqa: E402
+
+
+class CountingHandler:
+    """Receives the poller's events instead of MyHandler."""
+
+    def __init__(self):
+        self.events = 0
+
+    def dispatch(self, event):
+        self.events += 1
+
+    def wants(self, path):
+        return True
+
+
+def run_case(thread_count, active, seconds, write_interval):
+    for child in ROOT.iterdir():
+        shutil.rmtree(child)
+    for index in range(thread_count):
+        directory = ROOT / f"t{index}"
+        directory.mkdir()
+        (directory / "ProcessLogs.md").write_text("start\n")
+        (directory / "Results.csv").write_text("a,b\n1,2\n")
+
+    handler = CountingHandler()
+    poller = change.StatPoller()
+    poller.schedule(handler, str(ROOT))
+    for index in range(thread_count):
+        poller.schedule(handler, str(ROOT / f"t{index}"))
+    poller.start()
+
+    stop = threading.Event()
+
+    def writer():
+        index = 0
+        while not stop.is_set():
+            with open(ROOT / f"t{index % active}" / "ProcessLogs.md", "a") as handle:
+                handle.write("line\n")
+            index += 1
+            stop.wait(write_interval)
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    # Idle directories double their interval from POLL_MIN to the idle ceiling;
+    # wait for that ramp so the numbers reflect steady state.
+    idle_interval = max(change.POLL_MAX_SECONDS, (thread_count + 1) / change.POLL_IDLE_BUDGET)
+    time.sleep(2 * idle_interval + 1)
+    before = dict(poller.counters)
+    writer_thread.start()
+    time.sleep(seconds)
+    after = dict(poller.counters)
+    stop.set()
+    poller.stop()
+    poller.join()
+
+    sweeps = after["sweeps"] - before["sweeps"]
+    cpu = after["sweep_cpu_seconds"] - before["sweep_cpu_seconds"]
+    return {
+        "threads": thread_count,
+        "active": active,
+        "sweeps": sweeps,
+        "dirs_polled_per_second": round((after["dirs_polled"] - before["dirs_polled"]) / seconds, 1),
+        "cpu_ms_per_second": round(cpu / seconds * 1000, 3),
+        "cpu_us_per_sweep": round(cpu / sweeps * 1e6, 1) if sweeps else None,
+        "changes": after["changes"] - before["changes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--active", type=int, default=10, help="thread directories receiving writes")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    try:
+        report = [
+            run_case(count, min(args.active, count), args.seconds, args.write_interval)
+            for count in args.threads
+        ]
+    finally:
+        shutil.rmtree(ROOT, ignore_errors=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Per-report latency of convert.convert_to_html: in-process markdown-it renderer
+vs the old grip subprocess (REPORT_RENDERER=grip).
+
+Renders a synthetic 3GPP-style report (headings, tables, code blocks, lists)
+under distinct request_ids. "cold" makes every report unique so nothing is
+served from the content-hash cache; "cached" repeats the same content, which is
+rendered once and shared. grip needs the GitHub API, so on an offline host it
+writes an error page; the "valid" column says whether the output contains the
+rendered table:
+
+    python scripts/bench_report_render.py --iterations 200 --grip-iterations 5
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["WRITE_UI_ARTIFACTS"] = "true"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import convert  # noqa: E402
+
+
+def build_report(sections):
+    parts = ["# NR positioning accuracy: literature review\n"]
+    for index in range(sections):
+        parts.append(f"## {index + 1}. TS 38.{300 + index} findings\n")
+        parts.append(
+            "Positioning reference signals (PRS) reach **sub-metre** accuracy in ~~some~~ most "
+            f"indoor factory scenarios; see `TR 38.{857 + index}` for the evaluation set-up.\n"
+        )
+        parts.append("| Scenario | Method | 90% error (m) | Release |\n|---|---|---:|---|")
+        for row in range(8):
+            parts.append(f"| InF-DH {row} | DL-TDOA + UL-RTOA | {0.2 + row * 0.05:.2f} | Rel-{16 + row % 3} |")
+        parts.append("")
+        parts.append("- Carrier phase positioning\n- Sidelink positioning\n  - Low-power high-accuracy\n")
+        parts.append("```python\nerror = np.percentile(errors, 90)\nprint(f\"{error:.2f} m\")\n```\n")
+    return "\n".join(parts)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def run(mode, content, iterations, output_dir):
+    os.environ["REPORT_RENDERER"] = "grip" if mode == "grip" else "markdown-it"
+    latencies = []
+    valid = True
+    for index in range(iterations):
+        body = f"{content}\n<!-- report {index} -->\n" if mode == "cold" else content
+        started = time.perf_counter()
+        path = convert.convert_to_html(body, output_base=f"pathway_{mode}_{index}", output_dir=output_dir)
+        latencies.append(time.perf_counter() - started)
+        try:
+            valid = valid and "<table" in Path(path).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            valid = False
+    return {
+        "mode": mode,
+        "reports": iterations,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "valid": valid,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=12, help="report size")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--grip-iterations", type=int, default=5, help="0 skips the grip subprocess path")
+    args = parser.parse_args()
+
+    content = build_report(args.sections)
+    output_dir = tempfile.mkdtemp(prefix="bench-report-")
+    try:
+        report = [
+            run("cold", content, args.iterations, output_dir),
+            run("cached", content, args.iterations, output_dir),
+        ]
+        if args.grip_iterations and shutil.which("grip"):
+            report.append(run("grip", content, args.grip_iterations, output_dir))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    print(json.dumps({"report_bytes": len(content.encode("utf-8")), "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
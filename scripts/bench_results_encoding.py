@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Compare agent-ws wire encodings for large results tables.
+
+Builds synthetic 3GPP-style Results.csv tables, encodes them the way change.py
+does for each client encoding (json rows-as-objects, columnar JSON and
+columnar MessagePack) and reports frame size, permessage-deflate size and CPU
+time for each. Run from the repository root:
+
+    python scripts/bench_results_encoding.py --rows 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+os.environ.setdefault("PIPELINE_ARTIFACTS_DIR", os.path.join("/tmp", "agent-ws-bench-artifacts"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import change  # noqa: E402
+
+COLUMNS = [
+    "spec_id",
+    "release",
+    "series",
+    "section",
+    "title",
+    "working_group",
+    "status",
+    "change_request",
+    "impacted_feature",
+    "score",
+    "confidence",
+    "source_document",
+    "page",
+    "excerpt",
+]
+WORKING_GROUPS = ["RAN1", "RAN2", "RAN3", "SA2", "SA3", "CT1", "CT4"]
+FEATURES = ["NR-U", "IAB", "RedCap", "NTN", "V2X", "URLLC", "Positioning", "MBS"]
+
+
+def build_rows(count, rng):
+    rows = []
+    for index in range(count):
+        series = rng.choice(["23", "24", "29", "33", "36", "38"])
+        rows.append([
+            f"TS {series}.{rng.randint(100, 999)}",
+            f"Rel-{rng.randint(15, 19)}",
+            series,
+            f"{rng.randint(4, 12)}.{rng.randint(1, 9)}.{rng.randint(1, 20)}",
+            f"Procedure for {rng.choice(FEATURES)} handling {index}",
+            rng.choice(WORKING_GROUPS),
+            rng.choice(["approved", "agreed", "noted", "postponed"]),
+            f"CR{rng.randint(1, 2000):04d}",
+            rng.choice(FEATURES),
+            f"{rng.random():.4f}",
+            f"{rng.random():.2f}",
+            f"{rng.choice(['R1', 'R2', 'S2'])}-{rng.randint(2000000, 2499999)}.docx",
+            str(rng.randint(1, 400)),
+            "The UE shall apply the configuration received in the RRC message " * rng.randint(1, 2),
+        ])
+    return rows
+
+
+def measure(frame, encoding, level, window_bits, mem_level):
+    started = time.perf_counter()
+    encoded = frame.encode(encoding)
+    encode_ms = (time.perf_counter() - started) * 1000
+    payload = encoded if isinstance(encoded, bytes) else encoded.encode("utf-8")
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -window_bits, mem_level)
+    started = time.perf_counter()
+    deflated = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    deflate_ms = (time.perf_counter() - started) * 1000
+    return {
+        "encoding": encoding,
+        "bytes": len(payload),
+        "deflated_bytes": len(deflated),
+        "encode_ms": round(encode_ms, 2),
+        "deflate_ms": round(deflate_ms, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--level", type=int, default=change.DEFLATE_LEVEL)
+    parser.add_argument("--window-bits", type=int, default=change.DEFLATE_WINDOW_BITS)
+    parser.add_argument("--mem-level", type=int, default=change.DEFLATE_MEM_LEVEL)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a table")
+    args = parser.parse_args()
+
+    encodings = [name for name in change.WIRE_ENCODINGS if name != "msgpack" or change.msgpack is not None]
+    rng = random.Random(args.seed)
+    report = []
+    for count in args.rows:
+        frame = change.Frame({
+            "type": "results",
+            "format": "table",
+            "op": "snapshot",
+            "table_seq": 1,
+            "columns": COLUMNS,
+            "rows": build_rows(count, rng),
+            "thread_id": "bench",
+            "seq": 1,
+        })
+        for encoding in encodings:
+            result = measure(frame, encoding, args.level, args.window_bits, args.mem_level)
+            result["rows"] = count
+            report.append(result)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"deflate level={args.level} window_bits={args.window_bits} mem_level={args.mem_level}")
+    print(f"{'rows':>7} {'encoding':>9} {'bytes':>12} {'deflated':>11} {'encode ms':>10} {'deflate ms':>11}")
+    for result in report:
+        print(
+            f"{result['rows']:>7} {result['encoding']:>9} {result['bytes']:>12} "
+            f"{result['deflated_bytes']:>11} {result['encode_ms']:>10} {result['deflate_ms']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Before/after benchmark for the Flask API's SQLite access (app.py).
+
+Runs the chat list (GET /api/chats) and message post
+(POST /api/chats/<id>/messages) endpoints from several threads at once,
+first with SQLITE_POOLING=false (a fresh sqlite3.connect per helper call,
+rollback journal) and then with the pooled WAL connections. Each mode runs in
+its own process against a fresh database:
+
+    python scripts/bench_sqlite_api.py --threads 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MODES = {"legacy": "false", "pooled": "true"}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_workload(args):
+    """Child process: import app with the mode's env and hammer it."""
+    sys.path.insert(0, str(REPO_ROOT))
+    import app as api  # noqa: E402
+
+    users = []
+    with api.app.app_context():
+        with api.get_db_connection() as conn:
+            for index in range(args.users):
+                cursor = conn.execute(
+                    "INSERT INTO users (name, email, provider, created_at) VALUES (?, ?, 'local', ?)",
+                    (f"bench{index}", f"bench{index}@example.com", "2024-01-01T00:00:00+00:00"),
+                )
+                users.append({"id": cursor.lastrowid, "email": f"bench{index}@example.com", "name": f"bench{index}"})
+        with api.get_chat_db_connection() as conn:
+            for user in users:
+                user["threads"] = []
+                for index in range(args.chats_per_user):
+                    stamp = f"2024-01-01T00:{index // 60:02d}:{index % 60:02d}+00:00"
+                    cursor = conn.execute(
+                        "INSERT INTO chat_threads (user_id, title, last_message, created_at, updated_at)"
+                        " VALUES (?, ?, '', ?, ?)",
+                        (user["id"], f"chat {index}", stamp, stamp),
+                    )
+                    user["threads"].append(cursor.lastrowid)
+    for user in users:
+        user["headers"] = {"Authorization": f"Bearer {api.create_access_token(user)}"}
+
+    def phase(name, operation):
+        stop = threading.Event()
+        latencies = []
+        errors = []
+
+        def worker(index):
+            client = api.app.test_client()
+            user = users[index % len(users)]
+            count = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                status = operation(client, user, count)
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors.append(status)
+                count += 1
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {
+            "phase": name,
+            "requests_per_second": round(len(latencies) / args.seconds, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "errors": len(errors),
+        }
+
+    def list_chats(client, user, count):
+        return client.get("/api/chats", headers=user["headers"]).status_code
+
+    def post_message(client, user, count):
+        thread_id = user["threads"][count % len(user["threads"])]
+        return client.post(
+            f"/api/chats/{thread_id}/messages",
+            json={"role": "user" if count % 2 else "assistant", "content": f"benchmark message {count}"},
+            headers=user["headers"],
+        ).status_code
+
+    def mixed(client, user, count):
+        return (post_message if count % 4 == 0 else list_chats)(client, user, count)
+
+    return [phase("list", list_chats), phase("post", post_message), phase("mixed", mixed)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each phase")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--chats-per-user", type=int, default=50)
+    parser.add_argument("--run-mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        print(json.dumps(run_workload(args)))
+        return
+
+    report = {}
+    for mode, pooling in MODES.items():
+        with tempfile.TemporaryDirectory(prefix=f"bench-sqlite-{mode}-") as scratch:
+            env = {
+                **os.environ,
+                "SQLITE_POOLING": pooling,
+                "AUTH_DB_PATH": os.path.join(scratch, "auth.db"),
+                "CHAT_DB_PATH": os.path.join(scratch, "auth.db"),
+                "JWT_SECRET": "sqlite-benchmark-secret-0123456789abcdef",
+            }
+            command = [sys.executable, __file__, "--run-mode", mode] + sys.argv[1:]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True, cwd=scratch)
+            report[mode] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    print(json.dumps(report, indent=2))
+    print(f"\n{'phase':>6} {'legacy req/s':>13} {'pooled req/s':>13} {'legacy p99':>11} {'pooled p99':>11}")
+    for legacy, pooled in zip(report["legacy"], report["pooled"]):
+        print(
+            f"{legacy['phase']:>6} {legacy['requests_per_second']:>13} {pooled['requests_per_second']:>13} "
+            f"{legacy['p99_ms']:>11} {pooled['p99_ms']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
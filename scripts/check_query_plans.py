@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the chat API (app.py).
+
+Seeds a scratch chat database with millions of messages, drives the chat
+routes through Flask's test client, captures every SQL statement they run and
+checks its EXPLAIN QUERY PLAN. The check fails (exit status 1) if any
+statement on the chat tables scans a whole table or index or sorts through a
+temporary B-tree instead of using the indexes from CHAT_DB_MIGRATIONS:
+
+    python scripts/check_query_plans.py --messages 2000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CHAT_TABLES = ("chat_threads", "chat_messages", "chat_message_attachments", "chat_thread_tombstones")
+
+
+def seed(conn, users, threads, messages, attachments, rng):
+    stamp = "2024-01-01T00:00:00+00:00"
+    conn.executemany(
+        "INSERT INTO users (id, name, email, provider, created_at) VALUES (?, ?, ?, 'local', ?)",
+        ((user_id, f"user{user_id}", f"user{user_id}@example.com", stamp) for user_id in range(1, users + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO chat_threads (id, user_id, title, last_message, created_at, updated_at) VALUES (?, ?, ?, '', ?, ?)",
+        (
+            (thread_id, rng.randint(1, users), f"chat {thread_id}", stamp, f"2024-01-01T{thread_id % 24:02d}:00:00+00:00")
+            for thread_id in range(1, threads + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO chat_messages (id, thread_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+        (
+            (message_id, rng.randint(1, threads), "user" if message_id % 2 else "assistant", "seeded message", stamp)
+            for message_id in range(1, messages + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO chat_message_attachments (message_id, thread_id, filename, mime_type, size, created_at)"
+        " VALUES (?, ?, 'image.png', 'image/png', 1024, ?)",
+        ((rng.randint(1, messages), rng.randint(1, threads), stamp) for _ in range(attachments)),
+    )
+    conn.commit()
+
+
+def plan_problems(conn, statement):
+    problems = []
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}"):
+        detail = row[-1]
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and any(table in detail for table in CHAT_TABLES):
+            problems.append(detail)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=50000)
+    parser.add_argument("--messages", type=int, default=2000000)
+    parser.add_argument("--attachments", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory(prefix="query-plans-")
+    db_path = os.path.join(scratch.name, "chat.db")
+    os.environ.update({"AUTH_DB_PATH": db_path, "CHAT_DB_PATH": db_path, "JWT_SECRET": "query-plan-check-secret-0123456789abcdef"})
+    sys.path.insert(0, str(REPO_ROOT))
+    import app as api  # noqa: E402  (creates the schema and runs the migrations)
+
+    started = time.monotonic()
+    with sqlite3.connect(db_path) as conn:
+        seed(conn, args.users, args.threads, args.messages, args.attachments, random.Random(args.seed))
+        conn.execute("ANALYZE")
+        thread_id, user_id = conn.execute(
+            "SELECT thread_id, user_id FROM chat_messages JOIN chat_threads ON chat_threads.id = thread_id LIMIT 1"
+        ).fetchone()
+    print(f"Seeded {args.messages} messages in {time.monotonic() - started:.1f}s")
+
+    statements = []
+    open_connection = api.open_db_connection
+
+    def traced_connection(path):
+        conn = open_connection(path)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    api.open_db_connection = traced_connection
+    user = {"id": user_id, "email": f"user{user_id}@example.com", "name": f"user{user_id}"}
+    headers = {"Authorization": f"Bearer {api.create_access_token(user)}"}
+    client = api.app.test_client()
+    first_page = client.get("/api/chats?limit=20", headers=headers).get_json()
+    latest = client.get(f"/api/chats/{thread_id}?limit=20", headers=headers).get_json()["messages"]
+    requests = [
+        ("GET", "/api/chats", None),
+        ("GET", f"/api/chats?limit=20&before={first_page['next_cursor']}", None),
+        ("GET", f"/api/chats?after={first_page['next_cursor']}", None),
+        ("GET", f"/api/chats?since={first_page['watermark']}", None),
+        ("GET", f"/api/chats/{thread_id}", None),
+        ("GET", f"/api/chats/{thread_id}?limit=20&before={latest[-1]['id']}", None),
+        ("GET", f"/api/chats/{thread_id}?after={latest[0]['id']}", None),
+        ("GET", f"/api/chats/{thread_id}/results", None),
+        ("POST", f"/api/chats/{thread_id}/messages", {"role": "user", "content": "plan check"}),
+        ("DELETE", f"/api/chats/{thread_id}", None),
+    ]
+
+    failures = 0
+    with sqlite3.connect(db_path) as conn:
+        for method, path, body in requests:
+            del statements[:]
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"{method} {path} -> {response.status_code} in {elapsed_ms:.1f} ms")
+            for statement in statements:
+                if not any(table in statement for table in CHAT_TABLES):
+                    continue
+                problems = plan_problems(conn, statement)
+                summary = " ".join(statement.split())[:100]
+                if problems:
+                    failures += 1
+                    print(f"  FAIL {summary}")
+                    for problem in problems:
+                        print(f"       {problem}")
+                else:
+                    print(f"  ok   {summary}")
+
+    scratch.cleanup()
+    if failures:
+        print(f"{failures} statement(s) do not use an index")
+        sys.exit(1)
+    print("All chat queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
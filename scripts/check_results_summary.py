@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Regression check for the results summary endpoint (app.py).
+
+Writes a scratch Results.csv whose cells include "inf", "-inf", "nan" and
+values near the float64 limits, then drives /results and /results/summary
+through Flask's test client. The check fails (exit status 1) if a response is
+not strict JSON (Infinity/NaN), if a column holding non-finite cells is not
+typed as text, or if it sorts as numbers in /results but summarizes as
+something else:
+
+    python scripts/check_results_summary.py
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ROWS = [
+    {"spec": "TS 38.300", "score": "3", "ratio": "inf", "flag": "-inf", "huge": "1e308", "blank": ""},
+    {"spec": "TS 38.211", "score": "5", "ratio": "-inf", "flag": "nan", "huge": "1.7e308", "blank": ""},
+    {"spec": "TS 38.331", "score": "", "ratio": "3", "flag": "2", "huge": "-1e308", "blank": ""},
+]
+EXPECTED_TYPES = {"spec": "text", "score": "integer", "ratio": "text", "flag": "text", "huge": "integer", "blank": "float"}
+
+
+def strict_json(response):
+    def reject(constant):
+        raise ValueError(f"non-standard JSON constant {constant}")
+
+    return json.loads(response.get_data(as_text=True), parse_constant=reject)
+
+
+def main():
+    scratch = tempfile.TemporaryDirectory(prefix="results-summary-")
+    db_path = os.path.join(scratch.name, "chat.db")
+    os.environ.update({
+        "AUTH_DB_PATH": db_path,
+        "CHAT_DB_PATH": db_path,
+        "PIPELINE_ARTIFACTS_DIR": scratch.name,
+        "JWT_SECRET": "results-summary-check-secret-0123456789abcdef",
+    })
+    sys.path.insert(0, str(REPO_ROOT))
+    import app as api  # noqa: E402
+
+    with api.app.app_context():
+        with api.get_db_connection() as conn:
+            user_id = conn.execute(
+                "INSERT INTO users (name, email, provider, created_at) VALUES ('check', 'check@example.com', 'local', ?)",
+                ("2024-01-01T00:00:00+00:00",),
+            ).lastrowid
+        with api.get_chat_db_connection() as conn:
+            thread_id = conn.execute(
+                "INSERT INTO chat_threads (user_id, title, last_message, created_at, updated_at)"
+                " VALUES (?, 'check', '', ?, ?)",
+                (user_id, "2024-01-01T00:00:00+00:00", "2024-01-01T00:00:00+00:00"),
+            ).lastrowid
+    os.makedirs(os.path.join(scratch.name, str(thread_id)))
+    with open(os.path.join(scratch.name, str(thread_id), "Results.csv"), "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(ROWS[0]))
+        writer.writeheader()
+        writer.writerows(ROWS)
+
+    user = {"id": user_id, "email": "check@example.com", "name": "check"}
+    headers = {"Authorization": f"Bearer {api.create_access_token(user)}"}
+    client = api.app.test_client()
+    failures = []
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        summary = strict_json(client.get(f"/api/chats/{thread_id}/results/summary?group_by=flag", headers=headers))
+    types = {column["name"]: column["type"] for column in summary["columns"]}
+    for name, expected in EXPECTED_TYPES.items():
+        if types.get(name) != expected:
+            failures.append(f"column {name} summarized as {types.get(name)}, expected {expected}")
+    huge = next(column for column in summary["columns"] if column["name"] == "huge")
+    if huge["mean"] is not None:
+        failures.append(f"overflowed mean should be null, got {huge['mean']}")
+    print(json.dumps(summary, indent=2))
+
+    # A column summarized as text must also sort as text: "3" (a number) first, then the strings.
+    page = strict_json(client.get(f"/api/chats/{thread_id}/results?sort=ratio", headers=headers))
+    order = [row["ratio"] for row in page["rows"]]
+    if order != ["3", "-inf", "inf"]:
+        failures.append(f"sort=ratio returned {order}, expected ['3', '-inf', 'inf']")
+
+    scratch.cleanup()
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("Summary responses are strict JSON and non-finite cells are text")
+
+
+if __name__ == "__main__":
+    main()
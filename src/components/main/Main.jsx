@@ -49,6 +49,7 @@ const Main = ({ user }) => {
 		prevPrompts,
 		setPrevPrompts,
 		setResultsTable,
+		appendResultsRows,
 		setResultsUpdatedAt,
 		chatNo,
 		setChatNo,
@@ -57,6 +58,8 @@ const Main = ({ user }) => {
 		pushUploadNotice,
 		activeThreadId,
 		chatMessages,
+		hasOlderMessages,
+		loadOlderMessages,
 		createThread,
 		appendMessage,
 		persistMessage,
@@ -71,6 +74,8 @@ const Main = ({ user }) => {
 	const pendingThreadIdRef = useRef(null);
 	const isProcessingRef = useRef(false);
 	const activeThreadIdRef = useRef(activeThreadId);
+	const resultsSeqRef = useRef({});
+	const agentStreamRef = useRef({ epoch: null, seqByThread: {} });
 	const prevThreadIdRef = useRef(activeThreadId);
 	const agentSocketRef = useRef(null);
 	const mainSocketRef = useRef(null);
@@ -210,13 +215,25 @@ const Main = ({ user }) => {
 	const wsRootBaseUrl = wsBaseUrl.endsWith("/ws") ? wsBaseUrl.slice(0, -3) : wsBaseUrl;
 	const agentBaseUrl = normalizeWsBase(import.meta.env.VITE_AGENT_WS_BASE_URL || wsRootBaseUrl);
 	const mainWsUrl = wsBaseUrl.endsWith("/ws") ? wsBaseUrl : `${wsBaseUrl}/ws`;
-	const agentWsUrl = agentBaseUrl.endsWith("/agent-ws")
+	const agentWsUrl = `${agentBaseUrl.endsWith("/agent-ws")
 		? agentBaseUrl
-		: `${agentBaseUrl}/agent-ws`;
+		: `${agentBaseUrl}/agent-ws`}?format=columnar`;
+	// Columnar results frames send rows as arrays in `columns` order.
+	const toRowObjects = (columns, rows) =>
+		rows.map((row) =>
+			Array.isArray(row)
+				? Object.fromEntries(columns.map((column, index) => [column, row[index] ?? null]))
+				: row
+		);
 	const buildAgentSubscriptionPayload = (threadId) => {
 		const payload = threadId
-			? { type: "subscribe", thread_id: String(threadId) }
+			? { type: "subscribe", thread_id: String(threadId), replace: true }
 			: { type: "unsubscribe" };
+		const { epoch, seqByThread } = agentStreamRef.current;
+		if (threadId && epoch && seqByThread[String(threadId)] !== undefined) {
+			payload.epoch = epoch;
+			payload.last_seq = seqByThread[String(threadId)];
+		}
 		const token = getToken();
 		if (token) {
 			payload.auth_token = token;
@@ -279,12 +296,14 @@ const Main = ({ user }) => {
 	};
 
 
-	// Auto-scrolling effect when resultData changes
+	// Auto-scrolling effect when resultData changes. Keyed on the newest message so
+	// prepending an older page of history does not jump to the bottom.
+	const newestMessage = chatMessages[chatMessages.length - 1];
 	useEffect(() => {
 		if (resultDataRef.current) {
 			resultDataRef.current.scrollTop = resultDataRef.current.scrollHeight;
 		}
-	}, [resultData, agentData, chatMessages, loading]);
+	}, [resultData, agentData, newestMessage, loading]);
 	useEffect(() => {
 		if (agentDataRef.current) {
 			agentDataRef.current.scrollTop = agentDataRef.current.scrollHeight;
@@ -986,6 +1005,15 @@ const Main = ({ user }) => {
 			ws.onmessage = (event) => {
 				try {
 					const data = JSON.parse(event.data);
+					if (data.type === 'hello') {
+						if (agentStreamRef.current.epoch !== data.epoch) {
+							agentStreamRef.current = { epoch: data.epoch, seqByThread: {} };
+						}
+						return;
+					}
+					if (data.thread_id && typeof data.seq === 'number') {
+						agentStreamRef.current.seqByThread[String(data.thread_id)] = data.seq;
+					}
 					const currentThreadId = activeThreadIdRef.current;
 					const incomingThreadId = data.thread_id;
 					if (incomingThreadId && currentThreadId && String(incomingThreadId) !== String(currentThreadId)) {
@@ -1006,14 +1034,52 @@ const Main = ({ user }) => {
 						setMarkdownContent(prev => prev + data.response);
 					}
 
+					// ✅ HANDLE RESUME SNAPSHOTS (results table + log tail)
+					else if (data.type === 'snapshot') {
+						const table = data.results;
+						if (table) {
+							const seqKey = data.thread_id ? String(data.thread_id) : "global";
+							const tableColumns = Array.isArray(table.columns) ? table.columns : [];
+							const columns = tableColumns.filter(Boolean);
+							const rows = toRowObjects(tableColumns, Array.isArray(table.rows) ? table.rows : []);
+							resultsSeqRef.current[seqKey] = { seq: table.table_seq };
+							setResultsTable({ columns, rows }, data.thread_id);
+							setResultsUpdatedAt(Date.now(), data.thread_id);
+						}
+						if (isProcessingRef.current && data.logs_tail) {
+							setAgentData(data.logs_tail);
+							setMarkdownContent(data.logs_tail);
+						}
+					}
+
 					// ✅ HANDLE SIDEBAR RESULTS (CSV)
 					else if (data.type === 'results') {
 						if (!isProcessingRef.current) {
 							return;
 						}
-						const columns = Array.isArray(data.columns) ? data.columns.filter(Boolean) : [];
-						const rows = Array.isArray(data.rows) ? data.rows : [];
-						setResultsTable({ columns, rows }, data.thread_id);
+						const seqKey = data.thread_id ? String(data.thread_id) : "global";
+						const seqState = resultsSeqRef.current[seqKey] || {};
+						const dataColumns = Array.isArray(data.columns) ? data.columns : [];
+						const rows = toRowObjects(dataColumns, Array.isArray(data.rows) ? data.rows : []);
+						if (data.op === 'append') {
+							if (seqState.seq !== undefined && data.table_seq <= seqState.seq) {
+								return;
+							}
+							if (seqState.seq === undefined || data.table_seq !== seqState.seq + 1) {
+								// Missed part of the table; ask the server for a fresh snapshot.
+								if (!seqState.resyncPending) {
+									resultsSeqRef.current[seqKey] = { ...seqState, resyncPending: true };
+									ws.send(JSON.stringify({ type: 'resync', thread_id: data.thread_id }));
+								}
+								return;
+							}
+							resultsSeqRef.current[seqKey] = { seq: data.table_seq };
+							appendResultsRows(rows, data.thread_id);
+						} else {
+							const columns = dataColumns.filter(Boolean);
+							resultsSeqRef.current[seqKey] = { seq: data.table_seq };
+							setResultsTable({ columns, rows }, data.thread_id);
+						}
 						setResultsUpdatedAt(Date.now(), data.thread_id);
 					}
 
@@ -1244,6 +1310,11 @@ const Main = ({ user }) => {
 					) : (
 						<div className="result" ref={resultDataRef}>
 							<div className="chat-thread">
+								{hasOlderMessages && (
+									<button type="button" className="chat-load-older" onClick={loadOlderMessages}>
+										Load earlier messages
+									</button>
+								)}
 								{chatMessages.map((message, index) => {
 									const role = (message.role || "assistant").toLowerCase();
 									const messageKey = message.id || `${role}-${index}`;
@@ -15,6 +15,8 @@ const Sidebar = ({ onLogout }) => {
     selectThread,
     newChat,
     deleteThread,
+    threadsCursor,
+    loadMoreThreads,
     uploadNotice,
     pushUploadNotice
   } = useContext(Context);
@@ -131,6 +133,11 @@ const Sidebar = ({ onLogout }) => {
               )}
             </div>
           ))}
+          {threadsCursor && extended && (
+            <button type="button" className="recent-more" onClick={loadMoreThreads}>
+              Load older chats
+            </button>
+          )}
         </div>
 
         {/* ---------------- BOTTOM ---------------- */}
@@ -12,6 +12,12 @@ import {
 export const Context = createContext();
 
 const EMPTY_RESULTS_TABLE = { columns: [], rows: [] };
+const THREAD_SYNC_INTERVAL_MS = 30000;
+
+const sortThreads = (list) =>
+	[...list].sort(
+		(a, b) => new Date(b.updated_at).getTime() - new Date(a.updated_at).getTime()
+	);
 
 const ContextProvider = (props) => {
 	const [input, setInput] = useState("");
@@ -42,6 +48,9 @@ const ContextProvider = (props) => {
 	const [activeThreadId, setActiveThreadId] = useState(null);
 	const [chatMessages, setChatMessages] = useState([]);
 	const [chatHydrated, setChatHydrated] = useState(false);
+	const [threadsCursor, setThreadsCursor] = useState(null);
+	const [hasOlderMessages, setHasOlderMessages] = useState(false);
+	const threadsWatermarkRef = useRef(null);
 
 
 
@@ -97,6 +106,7 @@ const ContextProvider = (props) => {
 		setResultData("");
 		setAgentData("");
 		setChatMessages([]);
+		setHasOlderMessages(false);
 		setActiveThreadId(null);
 		setRecentPrompt("");
 	};
@@ -119,6 +129,17 @@ const ContextProvider = (props) => {
 		}));
 	};
 
+	const appendResultsRows = (rows, threadId = null) => {
+		const key = getThreadKey(threadId);
+		setResultsTablesByThread((prev) => {
+			const current = prev[key] || EMPTY_RESULTS_TABLE;
+			return {
+				...prev,
+				[key]: { ...current, rows: [...current.rows, ...rows] },
+			};
+		});
+	};
+
 	const setResultsUpdatedAt = (timestamp, threadId = null) => {
 		const key = getThreadKey(threadId);
 		setResultsUpdatedAtByThread((prev) => ({
@@ -164,6 +185,7 @@ const ContextProvider = (props) => {
 			const data = await getChat(threadId);
 			setActiveThreadId(data.thread.id);
 			setChatMessages(data.messages || []);
+			setHasOlderMessages(Boolean(data.has_older));
 			setShowResults((data.messages || []).length > 0);
 			setDownloadData(false);
 			setResultData("");
@@ -172,8 +194,43 @@ const ContextProvider = (props) => {
 			if (persist) {
 				localStorage.setItem("ui3gpp_active_thread", String(data.thread.id));
 			}
+			return true;
 		} catch (error) {
 			console.error("Failed to load chat thread:", error);
+			return false;
+		}
+	};
+
+	const loadOlderMessages = async () => {
+		if (!activeThreadId || !hasOlderMessages || chatMessages.length === 0) {
+			return;
+		}
+		const anchorId = chatMessages[0].id;
+		try {
+			const data = await getChat(activeThreadId, { before: anchorId });
+			// Ignore the page if another thread was selected while it loaded.
+			setChatMessages((prev) =>
+				prev.length > 0 && prev[0].id === anchorId ? [...(data.messages || []), ...prev] : prev
+			);
+			setHasOlderMessages(Boolean(data.has_older));
+		} catch (error) {
+			console.error("Failed to load older messages:", error);
+		}
+	};
+
+	const loadMoreThreads = async () => {
+		if (!threadsCursor) {
+			return;
+		}
+		try {
+			const data = await listChats({ before: threadsCursor });
+			setThreads((prev) => {
+				const seen = new Set(prev.map((thread) => String(thread.id)));
+				return [...prev, ...(data.threads || []).filter((thread) => !seen.has(String(thread.id)))];
+			});
+			setThreadsCursor(data.next_cursor || null);
+		} catch (error) {
+			console.error("Failed to load more chats:", error);
 		}
 	};
 
@@ -183,6 +240,8 @@ const ContextProvider = (props) => {
 			const data = await listChats();
 			const nextThreads = data.threads || [];
 			setThreads(nextThreads);
+			setThreadsCursor(data.next_cursor || null);
+			threadsWatermarkRef.current = data.watermark ?? null;
 			if (forceNewChat) {
 				sessionStorage.removeItem("ui3gpp_force_new_chat");
 				localStorage.removeItem("ui3gpp_active_thread");
@@ -197,10 +256,10 @@ const ContextProvider = (props) => {
 				}
 			}
 			if (!selectedId && nextThreads.length > 0) {
+				// The stored thread may be older than the first page, so ask for it directly.
 				const fallbackId = localStorage.getItem("ui3gpp_active_thread");
-				if (fallbackId && nextThreads.find((t) => String(t.id) === String(fallbackId))) {
-					await selectThread(fallbackId, { persist: false });
-				} else {
+				const restored = fallbackId && (await selectThread(fallbackId, { persist: false }));
+				if (!restored) {
 					await selectThread(nextThreads[0].id, { persist: true });
 				}
 			}
@@ -211,6 +270,35 @@ const ContextProvider = (props) => {
 		}
 	};
 
+	// Apply only what changed since the last list or sync reply.
+	const syncThreads = async () => {
+		if (threadsWatermarkRef.current === null) {
+			return;
+		}
+		try {
+			let data;
+			do {
+				data = await listChats({ since: threadsWatermarkRef.current });
+				const changed = data.threads || [];
+				const removed = new Set((data.deleted || []).map(String));
+				if (changed.length > 0 || removed.size > 0) {
+					const changedIds = new Set(changed.map((thread) => String(thread.id)));
+					setThreads((prev) =>
+						sortThreads([
+							...changed,
+							...prev.filter(
+								(thread) => !changedIds.has(String(thread.id)) && !removed.has(String(thread.id))
+							),
+						])
+					);
+				}
+				threadsWatermarkRef.current = data.watermark;
+			} while (data.has_more);
+		} catch (error) {
+			console.error("Failed to sync chats:", error);
+		}
+	};
+
 	const createThread = async (title) => {
 		try {
 			const data = await createChat(title);
@@ -224,6 +312,7 @@ const ContextProvider = (props) => {
 			setThreads((prev) => [newThread, ...prev]);
 			setActiveThreadId(data.id);
 			setChatMessages([]);
+			setHasOlderMessages(false);
 			setShowResults(false);
 			localStorage.setItem("ui3gpp_active_thread", String(data.id));
 			return data.id;
@@ -280,9 +369,7 @@ const ContextProvider = (props) => {
 					}
 					: thread
 			);
-			return [...updated].sort(
-				(a, b) => new Date(b.updated_at).getTime() - new Date(a.updated_at).getTime()
-			);
+			return sortThreads(updated);
 		});
 	};
 
@@ -298,6 +385,15 @@ const ContextProvider = (props) => {
 		refreshThreads();
 	}, []);
 
+	useEffect(() => {
+		const interval = setInterval(syncThreads, THREAD_SYNC_INTERVAL_MS);
+		window.addEventListener("focus", syncThreads);
+		return () => {
+			clearInterval(interval);
+			window.removeEventListener("focus", syncThreads);
+		};
+	}, []);
+
 	useEffect(() => {
 		return () => {
 			if (uploadNoticeTimerRef.current) {
@@ -480,6 +576,7 @@ const ContextProvider = (props) => {
 		setTotalDisplayedCharsRef,
 		resultsTable,
 		setResultsTable,
+		appendResultsRows,
 		resultsUpdatedAt,
 		setResultsUpdatedAt,
 		threads,
@@ -491,6 +588,10 @@ const ContextProvider = (props) => {
 		setChatMessages,
 		chatHydrated,
 		selectThread,
+		hasOlderMessages,
+		loadOlderMessages,
+		threadsCursor,
+		loadMoreThreads,
 		createThread,
 		appendMessage,
 		persistMessage,
@@ -20,7 +20,22 @@ const request = async (path, options = {}) => {
   return data;
 };
 
-export const listChats = () => request("/api/chats", { method: "GET" });
+const withQuery = (path, params = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== "") {
+      query.set(key, String(value));
+    }
+  });
+  const suffix = query.toString();
+  return suffix ? `${path}?${suffix}` : path;
+};
+
+// Threads come back newest first, one page at a time. Pass the previous
+// reply's next_cursor as `before` to load older threads, or its watermark as
+// `since` to get only the threads changed and the ids deleted since then.
+export const listChats = ({ limit, before, after, since } = {}) =>
+  request(withQuery("/api/chats", { limit, before, after, since }), { method: "GET" });
 
 export const createChat = (title) =>
   request("/api/chats", {
@@ -28,11 +43,27 @@ export const createChat = (title) =>
     body: JSON.stringify({ title }),
   });
 
-export const getChat = (threadId) =>
-  request(`/api/chats/${threadId}`, { method: "GET" });
+// Returns the latest page of messages; pass the oldest loaded message id as
+// `before` to page back through history.
+export const getChat = (threadId, { limit, before, after } = {}) =>
+  request(withQuery(`/api/chats/${threadId}`, { limit, before, after }), { method: "GET" });
 
-export const getChatResults = (threadId) =>
-  request(`/api/chats/${threadId}/results`, { method: "GET" });
+// With no options this returns the whole table. offset/limit page it,
+// columns is a list to project, sort is a column ("-col" for descending) and
+// filters are "column:op:value" strings (eq, ne, lt, le, gt, ge, contains).
+export const getChatResults = (threadId, { offset, limit, columns, sort, filters = [] } = {}) => {
+  const path = withQuery(`/api/chats/${threadId}/results`, {
+    offset,
+    limit,
+    sort,
+    columns: Array.isArray(columns) ? columns.join(",") : columns,
+  });
+  const filterQuery = filters
+    .map((filter) => `filter=${encodeURIComponent(filter)}`)
+    .join("&");
+  const separator = path.includes("?") ? "&" : "?";
+  return request(filterQuery ? `${path}${separator}${filterQuery}` : path, { method: "GET" });
+};
 
 export const addChatMessage = (threadId, payload) =>
   request(`/api/chats/${threadId}/messages`, {
@@ -42,3 +73,16 @@ export const addChatMessage = (threadId, payload) =>
 
 export const deleteChat = (threadId) =>
   request(`/api/chats/${threadId}`, { method: "DELETE" });
+
+// Per-column count/missing/min/max/mean/quantiles (text columns: distinct and
+// top values) plus optional group-by counts, computed server-side.
+export const getChatResultsSummary = (threadId, { columns, quantiles, groupBy, top } = {}) =>
+  request(
+    withQuery(`/api/chats/${threadId}/results/summary`, {
+      columns: Array.isArray(columns) ? columns.join(",") : columns,
+      quantiles: Array.isArray(quantiles) ? quantiles.join(",") : quantiles,
+      group_by: groupBy,
+      top,
+    }),
+    { method: "GET" }
+  );